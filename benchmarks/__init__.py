@@ -0,0 +1,6 @@
+""" Python module for parsing GEDCOM geneaology files - benchmarks
+
+    This package provides the performance benchmarks for the GEDCOM parsing
+    project. Run them from the repository root, e.g.
+    python -m benchmarks.memory
+"""
@@ -0,0 +1,65 @@
+""" Python module for parsing GEDCOM geneaology files - batch benchmark
+
+    Times validating a directory of small synthetic files with one
+    `run.py --file` process per file against a single `run.py --batch` run,
+    which forks its workers instead of starting Python for each file.
+
+    python -m benchmarks.batch [--files N] [--count N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_synthetic
+
+
+def main():
+    """ Runs the batch benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--files", type=int, default=200,
+                            help="Synthetic files in the directory")
+    arg_parser.add_argument("--count", type=int, default=200,
+                            help="Individuals in each synthetic file")
+    arg_parser.add_argument("--jobs", type=int,
+                            default=multiprocessing.cpu_count(),
+                            help="Worker processes. Default is one per CPU")
+    arguments = arg_parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    print "Writing %d files of %d individuals to %s" % (
+        arguments.files, arguments.count, directory)
+    filenames = []
+    for num in xrange(arguments.files):
+        filenames.append(os.path.join(directory, 'family%05d.ged' % num))
+        write_synthetic(filenames[-1], arguments.count, seed=num)
+
+    try:
+        with open(os.devnull, 'w') as devnull:
+            start = time.time()
+            for filename in filenames:
+                subprocess.call([sys.executable, 'run.py', '--file', filename,
+                                 '--output', os.devnull], stdout=devnull)
+            separate = time.time() - start
+
+            start = time.time()
+            subprocess.call([sys.executable, 'run.py', '--batch', directory,
+                             '--jobs', str(arguments.jobs),
+                             '--output', os.devnull], stdout=devnull)
+            batch = time.time() - start
+    finally:
+        shutil.rmtree(directory)
+
+    print '{:d} files  one process each {:>7.2f} s  batch on {:d} jobs '\
+        '{:>7.2f} s  speedup {:>5.2f}x'.format(
+            arguments.files, separate, arguments.jobs, batch,
+            separate / batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+""" Python module for parsing GEDCOM geneaology files - date rule benchmark
+
+    Times the per-record date user stories (US01, US03, US04, US07) looping
+    over the records against the NumPy date columns, on a synthetic file,
+    for a database of parsed models and one over a GedcomTable. Building the
+    date columns is included in the NumPy timings.
+
+    python -m benchmarks.date_rules [--count N] [--file PATH]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from src.parser import parse_ged, parse_table
+from src.database import GedcomDatabase
+from src.findings import ValidationResult
+from src.user_stories import dates_before_current, birth_before_death, \
+    marriage_before_divorce, age_less_150
+from benchmarks.synthetic import write_synthetic
+
+RULES = (dates_before_current, birth_before_death, marriage_before_divorce,
+         age_less_150)
+
+
+def run_rules(make_db, vectorised):
+    """ Runs the date rules on a fresh database. Returns the findings. """
+    db = make_db(vectorised)
+    result = ValidationResult()
+    for rule in RULES:
+        rule(db, result)
+    return result.findings
+
+
+def main():
+    """ Runs the date rule benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--count", type=int, default=1000000,
+                            help="Individuals in the synthetic file")
+    arg_parser.add_argument("--file", help="Existing GEDCOM file to use")
+    arg_parser.add_argument("--repeat", type=int, default=3,
+                            help="Timing repetitions, the best is reported")
+    arguments = arg_parser.parse_args()
+
+    if GedcomDatabase([], []).date_columns is None:
+        print "NumPy is not installed"
+        exit(-1)
+
+    path = arguments.file
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.ged')
+        os.close(handle)
+        print "Writing %d individuals to %s" % (arguments.count, path)
+        write_synthetic(path, arguments.count)
+
+    try:
+        individuals, families = parse_ged(path)
+        table = parse_table(path)
+    finally:
+        if arguments.file is None:
+            os.remove(path)
+
+    # Databases are built up front so only the rules are timed
+    sources = (
+        ('records', {
+            False: GedcomDatabase(individuals, families, vectorised=False),
+            True: GedcomDatabase(individuals, families)}),
+        ('table', {
+            False: GedcomDatabase.from_table(table, vectorised=False),
+            True: GedcomDatabase.from_table(table)}))
+
+    for source, dbs in sources:
+        def make_db(vectorised):
+            """ Returns a database without cached date columns """
+            db = dbs[vectorised]
+            db._date_columns = None
+            return db
+
+        if run_rules(make_db, False) != run_rules(make_db, True):
+            print "Loop and NumPy findings differ for %s" % source
+            exit(-1)
+
+        timings = {}
+        for vectorised in (False, True):
+            timings[vectorised] = min(timeit.repeat(
+                lambda: run_rules(make_db, vectorised),
+                number=1, repeat=arguments.repeat))
+        print '{:8s} loop {:>7.3f} s  numpy {:>7.3f} s  speedup {:>5.1f}x'\
+            .format(source, timings[False], timings[True],
+                    timings[False] / timings[True])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+""" Python module for parsing GEDCOM geneaology files - incremental benchmark
+
+    Times parsing and validating a synthetic file from scratch against
+    bringing an incremental validation up to date after one individual's
+    birth date is edited.
+
+    python -m benchmarks.incremental [--count N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.parser import parse_ged
+from src.database import GedcomDatabase
+from src.user_stories import run_rules, RULES
+from src.incremental import IncrementalValidation
+from benchmarks.synthetic import write_synthetic
+
+
+def main():
+    """ Runs the incremental benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--count", type=int, default=200000,
+                            help="Individuals in the synthetic file")
+    arg_parser.add_argument("--edits", type=int, default=3,
+                            help="Edits to time, the best is reported")
+    arguments = arg_parser.parse_args()
+
+    handle, path = tempfile.mkstemp(suffix='.ged')
+    os.close(handle)
+    print "Writing %d individuals to %s" % (arguments.count, path)
+    write_synthetic(path, arguments.count)
+
+    try:
+        start = time.time()
+        run_rules(GedcomDatabase(*parse_ged(path)), RULES)
+        full = time.time() - start
+
+        incremental = IncrementalValidation(path)
+        incremental.update()
+
+        with open(path) as ged_file:
+            text = ged_file.read()
+        best = None
+        for edit in xrange(arguments.edits):
+            # Move the birth of an individual in the middle of the file
+            uid = '0 @I%d@ INDI\n' % (arguments.count // 2 + edit)
+            at = text.index('1 BIRT\n2 DATE ', text.index(uid))
+            line_end = text.index('\n', at + 14)
+            text = text[:at] + '1 BIRT\n2 DATE 1 JAN 1901' + text[line_end:]
+            with open(path, 'w') as ged_file:
+                ged_file.write(text)
+
+            start = time.time()
+            incremental.update()
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        os.remove(path)
+
+    print 'full {:>7.3f} s  incremental {:>7.3f} s  speedup {:>5.1f}x  '\
+        '({} blocks parsed, {} records checked)'.format(
+            full, best, full / best, incremental.parsed, incremental.checked)
+
+
+if __name__ == '__main__':
+    main()
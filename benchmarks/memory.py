@@ -0,0 +1,111 @@
+""" Python module for parsing GEDCOM geneaology files - memory benchmark
+
+    Reports the resident memory used per parsed individual with the slotted
+    models, the previous dict-backed models and the columnar GedcomTable, on
+    a synthetic file. The peak while parsing also counts the mapped file and
+    the parse caches, so for the table the bytes it holds once built are
+    reported too.
+
+    python -m benchmarks.memory [--count N] [--file PATH]
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+
+import src.parser
+from src.models import extract_id
+from benchmarks.synthetic import write_synthetic
+
+
+class DictIndividual(object):
+    """ Dict-backed Individual, as the models were before __slots__ """
+
+    def __init__(self, uid):
+        self.uid = uid
+        self.int_id = extract_id(uid)
+        self.name = None
+        self.given = ""
+        self.surname = ""
+        self.sex = None
+        self.birthdate = 0
+        self.death = 0
+        self.famc = []
+        self.fams = []
+
+
+class DictFamily(object):
+    """ Dict-backed Family, as the models were before __slots__ """
+
+    def __init__(self, uid):
+        self.uid = uid
+        self.int_id = extract_id(uid)
+        self.marriage = 0
+        self.husband = None
+        self.wife = None
+        self.children = []
+        self.divorce = 0
+
+
+def measure(path, variant):
+    """ Parses path in a forked child and returns the growth of its peak
+    resident set in bytes, the bytes held by the parsed store (0 unless it
+    is a GedcomTable) and the number of individuals """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        held = 0
+        if variant == 'table':
+            table = src.parser.parse_table(path)
+            held = table.nbytes()
+            count = table.individual_count()
+        else:
+            if variant == 'dict-backed':
+                src.parser.Individual = DictIndividual
+                src.parser.Family = DictFamily
+            count = len(src.parser.parse_ged(path)[0])
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        os.write(write_fd, '%d %d %d' % ((after - before) * 1024, held,
+                                         count))
+        os._exit(0)
+
+    os.close(write_fd)
+    growth, held, count = [int(x) for x in os.read(read_fd, 64).split()]
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return growth, held, count
+
+
+def main():
+    """ Runs the memory benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--count", type=int, default=1000000,
+                            help="Individuals in the synthetic file")
+    arg_parser.add_argument("--file", help="Existing GEDCOM file to use")
+    arguments = arg_parser.parse_args()
+
+    path = arguments.file
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.ged')
+        os.close(handle)
+        print "Writing %d individuals to %s" % (arguments.count, path)
+        write_synthetic(path, arguments.count)
+
+    try:
+        for variant in ('dict-backed', 'slots', 'table'):
+            growth, held, count = measure(path, variant)
+            print '{:12s} {:>14,d} bytes  {:>8.1f} bytes/individual'\
+                .format(variant, growth, float(growth) / max(count, 1))
+            if held:
+                print '{:12s} {:>14,d} bytes  {:>8.1f} bytes/individual'\
+                    .format('  held', held, float(held) / max(count, 1))
+    finally:
+        if arguments.file is None:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
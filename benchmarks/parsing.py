@@ -0,0 +1,80 @@
+""" Python module for parsing GEDCOM geneaology files - parsing benchmark
+
+    Times the memory mapped tokenizer against reading the file as lines, and
+    parsing on one process against splitting the file into byte ranges
+    parsed on a pool of worker processes, records merged in the parent
+    included, and parsing against loading the parse cache snapshot,
+    hashing the file included. With --sources the synthetic file carries the source
+    citations and notes the parser skips.
+
+    python -m benchmarks.parsing [--count N] [--file PATH] [--sources]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import timeit
+
+from src.parser import parse_ged, parse_parallel, iter_records
+from src.cache import ParseCache, parse_cached
+from benchmarks.synthetic import write_synthetic
+
+
+def main():
+    """ Runs the parsing benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--count", type=int, default=200000,
+                            help="Individuals in the synthetic file")
+    arg_parser.add_argument("--file", help="Existing GEDCOM file to use")
+    arg_parser.add_argument("--repeat", type=int, default=3,
+                            help="Timing repetitions, the best is reported")
+    arg_parser.add_argument("--jobs", type=int,
+                            default=multiprocessing.cpu_count(),
+                            help="Worker processes. Default is one per CPU")
+    arg_parser.add_argument("--sources", action="store_true", default=False,
+                            help="Add source citations and notes to the "
+                            "synthetic file")
+    arguments = arg_parser.parse_args()
+
+    path = arguments.file
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.ged')
+        os.close(handle)
+        print "Writing %d individuals to %s" % (arguments.count, path)
+        write_synthetic(path, arguments.count, sources=arguments.sources)
+
+    def parse_lines():
+        """ Parses the file read as lines """
+        with open(path) as ged_file:
+            return list(iter_records(ged_file))
+
+    directory = tempfile.mkdtemp()
+    cache = ParseCache(directory)
+    try:
+        lines = min(timeit.repeat(parse_lines, number=1,
+                                  repeat=arguments.repeat))
+        serial = min(timeit.repeat(lambda: parse_ged(path), number=1,
+                                   repeat=arguments.repeat))
+        parallel = min(timeit.repeat(
+            lambda: parse_parallel(path, arguments.jobs), number=1,
+            repeat=arguments.repeat))
+        parse_cached(path, cache)
+        cached = min(timeit.repeat(lambda: parse_cached(path, cache),
+                                   number=1, repeat=arguments.repeat))
+    finally:
+        shutil.rmtree(directory)
+        if arguments.file is None:
+            os.remove(path)
+
+    print 'lines {:>7.3f} s  mapped  {:>7.3f} s  speedup {:>4.2f}x'\
+        .format(lines, serial, lines / serial)
+    print '1 job {:>7.3f} s  {:2d} jobs {:>7.3f} s  speedup {:>4.2f}x'\
+        .format(serial, arguments.jobs, parallel, serial / parallel)
+    print 'parse {:>7.3f} s  cached  {:>7.3f} s  speedup {:>4.2f}x'\
+        .format(serial, cached, serial / cached)
+
+
+if __name__ == '__main__':
+    main()
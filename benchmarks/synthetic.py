@@ -0,0 +1,74 @@
+""" Python module for parsing GEDCOM geneaology files - synthetic files
+
+    This file generates large synthetic GEDCOM files for the benchmarks
+"""
+
+import random
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP',
+          'OCT', 'NOV', 'DEC']
+GIVEN = ['John', 'Mary', 'Robert', 'Sue', 'Anne', 'Patrick', 'Edward',
+         'Carol', 'Joseph', 'Elizabeth', 'Steven', 'Nicole']
+SURNAMES = ['Smith', 'Williams', 'Johnson', 'Miller', 'Davis', 'Taylor',
+            'Brown', 'Jones', 'Wilson', 'Moore']
+
+
+def _date(year):
+    """ Returns a random GEDCOM date in the given year """
+    return '%d %s %d' % (random.randint(1, 28), random.choice(MONTHS), year)
+
+
+def write_synthetic(path, count, seed=555, sources=False):
+    """ Writes a GEDCOM file with 'count' individuals to path. Individuals
+    are paired into families of two spouses and two children, so the file
+    holds roughly count / 4 families. With sources, every birth carries a
+    source citation and every individual a note, as exports from genealogy
+    programs do; the parser reads neither. """
+    random.seed(seed)
+    fam_count = count // 4
+
+    with open(path, 'w') as ged_file:
+        ged_file.write('0 HEAD\n1 CHAR UTF-8\n')
+
+        for num in xrange(1, count + 1):
+            # Individuals 4k+1/4k+2 are spouses in F(k+1), 4k+3/4k+4 children
+            fam = (num - 1) // 4 + 1
+            role = (num - 1) % 4
+            surname = SURNAMES[fam % len(SURNAMES)]
+            birth_year = 1800 + (fam % 150) + (25 if role > 1 else 0)
+
+            given = random.choice(GIVEN)
+
+            ged_file.write('0 @I%d@ INDI\n' % num)
+            ged_file.write('1 NAME %s /%s/\n' % (given, surname))
+            ged_file.write('2 GIVN %s\n2 SURN %s\n' % (given, surname))
+            ged_file.write('1 SEX %s\n' % ('M' if role % 2 == 0 else 'F'))
+            ged_file.write('1 BIRT\n2 DATE %s\n' % _date(birth_year))
+            if sources:
+                ged_file.write('2 SOUR @S1@\n3 PAGE Register of baptisms, '
+                               'vol. %d, entry %d\n3 DATA\n4 TEXT Baptised '
+                               'in the parish church\n' % (fam % 40, num))
+            # Nobody born before 1900 is still living
+            if birth_year < 1900 or (role < 2 and fam % 3 == 0):
+                ged_file.write('1 DEAT Y\n2 DATE %s\n' % _date(birth_year + 70))
+            if fam <= fam_count:
+                if role < 2:
+                    ged_file.write('1 FAMS @F%d@\n' % fam)
+                else:
+                    ged_file.write('1 FAMC @F%d@\n' % fam)
+            if sources:
+                ged_file.write('1 NOTE Transcribed from the parish records '
+                               'by a volunteer\n')
+
+        for fam in xrange(1, fam_count + 1):
+            first = (fam - 1) * 4 + 1
+            ged_file.write('0 @F%d@ FAM\n' % fam)
+            ged_file.write('1 HUSB @I%d@\n1 WIFE @I%d@\n' % (first, first + 1))
+            ged_file.write('1 CHIL @I%d@\n1 CHIL @I%d@\n' % (first + 2,
+                                                            first + 3))
+            ged_file.write('1 MARR\n2 DATE %s\n'
+                           % _date(1800 + (fam % 150) + 22))
+
+        if sources:
+            ged_file.write('0 @S1@ SOUR\n1 TITL Parish registers\n')
+        ged_file.write('0 TRLR\n')
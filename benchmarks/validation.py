@@ -0,0 +1,83 @@
+""" Python module for parsing GEDCOM geneaology files - validation benchmark
+
+    Times validation rule by rule against the fused validator, with and
+    without the NumPy date columns, on a synthetic file: for every user
+    story and for only those with per-record checks, the ones the fused
+    passes cover. Then times every user story on one process against a
+    pool of worker processes, with the indexes built as part of each run.
+
+    python -m benchmarks.validation [--count N] [--file PATH]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import timeit
+
+from src.parser import parse_ged
+from src.database import GedcomDatabase
+from src.user_stories import run_rules, run_fused, RULES
+from src.parallel import run_parallel
+from benchmarks.synthetic import write_synthetic
+
+
+def main():
+    """ Runs the validation benchmark """
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--count", type=int, default=200000,
+                            help="Individuals in the synthetic file")
+    arg_parser.add_argument("--file", help="Existing GEDCOM file to use")
+    arg_parser.add_argument("--repeat", type=int, default=3,
+                            help="Timing repetitions, the best is reported")
+    arg_parser.add_argument("--jobs", type=int,
+                            default=multiprocessing.cpu_count(),
+                            help="Worker processes. Default is one per CPU")
+    arguments = arg_parser.parse_args()
+
+    path = arguments.file
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.ged')
+        os.close(handle)
+        print "Writing %d individuals to %s" % (arguments.count, path)
+        write_synthetic(path, arguments.count)
+
+    try:
+        individuals, families = parse_ged(path)
+    finally:
+        if arguments.file is None:
+            os.remove(path)
+
+    per_record = [rule for rule in RULES if rule.checks is not None]
+    for stories, rules in (('all', RULES), ('per-record', per_record)):
+        for vectorised in (False, True):
+            # Indexes are built once, outside the timings
+            db = GedcomDatabase(individuals, families, vectorised=vectorised)
+            run_rules(db, rules)
+
+            timings = {}
+            for runner in (run_rules, run_fused):
+                timings[runner] = min(timeit.repeat(
+                    lambda: runner(db, rules),
+                    number=1, repeat=arguments.repeat))
+            print '{:10s} {:8s} rules {:>6.3f} s  fused {:>6.3f} s  '\
+                'speedup {:>4.2f}x'.format(
+                    stories, 'numpy' if vectorised else 'no numpy',
+                    timings[run_rules], timings[run_fused],
+                    timings[run_rules] / timings[run_fused])
+
+    def time_run(run):
+        """ Best time of run on a database without any indexes built """
+        return min(timeit.repeat(
+            lambda: run(GedcomDatabase(individuals, families)),
+            number=1, repeat=arguments.repeat))
+
+    serial = time_run(lambda db: run_rules(db, RULES))
+    parallel = time_run(lambda db: run_parallel(db, RULES, arguments.jobs))
+    print '{:10s} {:8s} 1 job {:>6.3f} s  {:2d} jobs {:>6.3f} s  '\
+        'speedup {:>4.2f}x'.format('all', 'numpy', serial, arguments.jobs,
+                                   parallel, serial / parallel)
+
+
+if __name__ == '__main__':
+    main()
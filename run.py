@@ -1,14 +1,22 @@
 #!/usr/bin/env python
 
 import sys
+import multiprocessing
 import operator
 import os
 import unittest
 import argparse
 
 # Project imports
-from src.parser import parse_ged
-from src.user_stories import validation, anomaly_locations, error_locations
+from src.parser import parse_ged, parse_parallel
+from src.dates import to_string
+from src.database import GedcomDatabase
+from src.cache import ParseCache, parse_cached, DEFAULT_MAX_BYTES
+from src.user_stories import validation, select_rules
+from src.findings import ERROR, ANOMALY
+from src.reporter import REPORTERS
+from src.watch import watch
+from src.batch import find_files, run_batch, write_report, TIMEOUT
 from src.unit_tests import TestParser
 
 """ Python module for parsing GEDCOM geneaology files - main file
@@ -31,6 +39,12 @@ __email__ = "rhousley@stevens.edu, bgardne2@stevens.edu, mmccart1@stevens.edu"
 
 FILENAME = 'default_ged.ged'
 
+# (dest, flag) of the options that only apply to validating one file; the
+# text report of --batch and --watch has no other format either
+SINGLE_FILE_OPTIONS = (("graphing_flag", "--visualization"),
+                       ("parse_jobs", "--parse-jobs"), ("cache", "--cache"),
+                       ("format", "--format"))
+
 
 def main():
     """ Main function for parsing of GEDCOM"""
@@ -47,8 +61,86 @@ def main():
                         default=FILENAME,
                         help="Specify a specific file to run GEDCOM parser on. \
                         Default is " + FILENAME)
+    action.add_argument("--watch", metavar="PATH",
+                        help="Stay running and revalidate the GEDCOM file, \
+                        or the .ged files under the directory, PATH whenever \
+                        it changes, printing new and resolved findings")
+    action.add_argument("--batch", metavar="DIR",
+                        help="Validate every .ged file under DIR, each on a \
+                        worker process of its own, and write one report of \
+                        the findings per file and per user story")
+
+    arg_parser.add_argument("--parse-jobs", type=int, default=1,
+                            help="Parse the file on PARSE_JOBS worker \
+                            processes. Default is 1")
+    arg_parser.add_argument("--cache", metavar="DIR",
+                            help="Load the parsed file from a snapshot in \
+                            DIR when it is unchanged, storing one otherwise")
+    arg_parser.add_argument("--cache-size", metavar="MB", type=int,
+                            default=DEFAULT_MAX_BYTES // 2 ** 20,
+                            help="Most MB of snapshots kept in the cache \
+                            directory. Default is %(default)s")
+    arg_parser.add_argument("--timeout", metavar="SECONDS", type=int,
+                            default=TIMEOUT,
+                            help="With --batch, give up on a file after \
+                            SECONDS. Default is %(default)s")
+    arg_parser.add_argument("--rules", type=story_list,
+                            help="Comma separated user stories to run, e.g. \
+                            US01,US11. Default is all")
+    arg_parser.add_argument("--skip", type=story_list,
+                            help="Comma separated user stories not to run")
+    execution = arg_parser.add_mutually_exclusive_group()
+    execution.add_argument("--fused", action="store_true", default=False,
+                           help="Validate in one pass over the individuals \
+                           and one over the families")
+    execution.add_argument("-j", "--jobs", type=int,
+                           help="Run the user stories, or with --batch \
+                           validate the files, on JOBS worker processes. \
+                           Default is 1, or one per CPU with --batch")
+    arg_parser.add_argument("--format", choices=REPORTERS.keys(),
+                            default="text",
+                            help="Format of the errors and anomalies. \
+                            Default is text")
+    arg_parser.add_argument("-o", "--output",
+                            help="Write the errors and anomalies to OUTPUT \
+                            instead of the console")
 
     arguments = arg_parser.parse_args()
+    try:
+        rules = select_rules(arguments.rules, arguments.skip)
+    except ValueError as error:
+        arg_parser.error(str(error))
+    if arguments.jobs is not None and arguments.jobs < 1:
+        arg_parser.error("--jobs must be at least 1")
+    if arguments.parse_jobs < 1:
+        arg_parser.error("--parse-jobs must be at least 1")
+    if arguments.watch:
+        unused_options(arg_parser, arguments, "--watch",
+                       SINGLE_FILE_OPTIONS + (("timeout", "--timeout"),
+                                              ("fused", "--fused"),
+                                              ("jobs", "--jobs")))
+        if not os.path.exists(arguments.watch):
+            print "[!!] \"%s\" does not exist.\nExiting..." % arguments.watch
+            exit(-1)
+        output = open(arguments.output, 'w') if arguments.output \
+            else sys.stdout
+        try:
+            watch(arguments.watch, rules, stream=output)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        print "\nDone!"
+        exit()
+    if arguments.batch:
+        unused_options(arg_parser, arguments, "--batch", SINGLE_FILE_OPTIONS)
+        if arguments.timeout < 1:
+            arg_parser.error("--timeout must be at least 1")
+        if not os.path.isdir(arguments.batch):
+            print "[!!] Directory \"%s\" does not exist.\nExiting..." \
+                % arguments.batch
+            exit(-1)
+        batch(arguments, rules)
+        exit()
     if (arguments.test):
         suite = unittest.TestLoader().loadTestsFromTestCase(TestParser)
         if unittest.TextTestRunner(verbosity=1).run(suite).failures:
@@ -58,15 +150,37 @@ def main():
     else:
         path = arguments.file
         if os.path.exists(path):
-            individuals, families = parse_ged(path)
+            if arguments.parse_jobs > 1:
+                parse = lambda name: parse_parallel(name, arguments.parse_jobs)
+            else:
+                parse = parse_ged
+            if arguments.cache:
+                cache = ParseCache(arguments.cache,
+                                   arguments.cache_size * 2 ** 20)
+                individuals, families = parse_cached(path, cache, parse)
+            else:
+                individuals, families = parse(path)
         else:
             print "[!!] File \"%s\" does not exist.\nExiting..." % path
             exit(-1)
+    db = GedcomDatabase(individuals, families)
+
+    # The console is left to the findings when they are machine readable
+    console = arguments.format == "text" or arguments.output is not None
+
     # Print Summary of results
-    summary(individuals, families)
+    if console:
+        summary(db)
 
     # Run error & anomaly detection on parsed data
-    validation(individuals, families)
+    output = open(arguments.output, 'w') if arguments.output else sys.stdout
+    try:
+        reporter = REPORTERS[arguments.format](output)
+        result = validation(db, rules, fused=arguments.fused,
+                            reporter=reporter, jobs=arguments.jobs or 1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
 
     # Create Visualization
     if arguments.graphing_flag:
@@ -74,20 +188,50 @@ def main():
             # Do import here to prevent import error on new systems
             from src.vis import graph_family
             graph_family(families, individuals,
-                         errors=error_locations, anomalies=anomaly_locations)
+                         errors=result.locations(ERROR),
+                         anomalies=result.locations(ANOMALY))
 
         except ImportError:
             print "GraphViz python import not installed!"
 
-    print "\nDone!"
+    if console:
+        print "\nDone!"
     exit()
 
 
-def summary(individuals, families):
+def batch(arguments, rules):
+    """ Validates the .ged files of the --batch directory, writing the
+    report to the console or --output """
+    filenames = find_files(arguments.batch)
+    jobs = arguments.jobs or multiprocessing.cpu_count()
+    output = open(arguments.output, 'w') if arguments.output else sys.stdout
+    try:
+        write_report(run_batch(filenames, rules, jobs, arguments.timeout,
+                               arguments.fused), rules, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def unused_options(arg_parser, arguments, mode, options):
+    """ Exits with a usage error if one of options, (dest, flag) pairs of
+    options mode does not use, was given """
+    for dest, flag in options:
+        if getattr(arguments, dest) != arg_parser.get_default(dest):
+            arg_parser.error("%s cannot be used with %s" % (flag, mode))
+
+
+def story_list(text):
+    """ Parses a comma separated list of user story ids """
+    return [story.strip().upper() for story in text.split(',')
+            if story.strip()]
+
+
+def summary(db):
     """ Prints a summary of the GEDCOM file """
 
-    individuals.sort(key=operator.attrgetter('int_id'))
-    families.sort(key=operator.attrgetter('int_id'))
+    individuals = sorted(db.individuals, key=operator.attrgetter('int_id'))
+    families = sorted(db.families, key=operator.attrgetter('int_id'))
 
     print "\n"
     print 'INDIVIDUALS'.center(80, ' ')
@@ -98,7 +242,7 @@ def summary(individuals, families):
     for indiv in individuals:
         print '{:6s} {:20s} {:5s} {:.10s}     {:.10s}'\
             .format(indiv.uid, ' '.join(indiv.name), indiv.sex,
-                    str(indiv.birthdate), str(indiv.death))
+                    to_string(indiv.birthdate), to_string(indiv.death))
 
     print "\n\n"
     print 'FAMILIES'.center(80, ' ')
@@ -108,17 +252,22 @@ def summary(individuals, families):
                 '# Child')
     print '-' * 80
     for family in families:
-        husband_name = None
-        wife_name = None
-        for indiv in individuals:
-            if family.husband == indiv.uid:
-                husband_name = indiv.name
-            if family.wife == indiv.uid:
-                wife_name = indiv.name
+        husband = db.individual(family.husband)
+        wife = db.individual(family.wife)
+        husband_name = ' '.join(husband.name) if husband else ''
+        wife_name = ' '.join(wife.name) if wife else ''
         print '{:6s} {:20s} {:20s} {:10.10s} {:10.10s} {}'\
-            .format(family.uid, ' '.join(husband_name), ' '.join(wife_name),
-                    str(family.marriage), str(family.divorce),
+            .format(family.uid, husband_name, wife_name,
+                    to_string(family.marriage), to_string(family.divorce),
                     len(family.children))
+
+    print "\n\n"
+    print 'SURNAMES'.center(80, ' ')
+    print "\n"
+    print '{:20s} {}'.format('Surname', '# Individuals')
+    print '-' * 80
+    for surname, people in sorted(db.surnames.items()):
+        print '{:20s} {}'.format(surname or '(none)', len(people))
     print "\n\n"
 
 if __name__ == '__main__':
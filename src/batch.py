@@ -0,0 +1,179 @@
+""" Python module for parsing GEDCOM geneaology files - batch validation
+
+    This file validates every GEDCOM file under a directory on a pool of
+    worker processes and writes one report for all of them
+"""
+
+import multiprocessing
+import os
+import select
+import sys
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+from database import GedcomDatabase
+from findings import ERROR, ANOMALY, LISTING
+from parser import parse_ged
+from reporter import table_rows, table_locations
+from user_stories import run_rules, run_fused, RULES
+
+TIMEOUT = 300  # Seconds a single file may take
+
+# Status of a file in a batch
+OK = "ok"
+FAILED = "failed"  # The parser or a user story raised an exception
+CRASHED = "crashed"  # The worker died without a result
+TIMED_OUT = "timed out"
+
+# The result of validating one file of a batch: its status, a description
+# of what went wrong if it was not validated, and its findings
+Outcome = namedtuple('Outcome', ('filename', 'status', 'detail', 'findings'))
+
+
+def find_files(directory):
+    """ Returns the paths of the GEDCOM files under directory and its
+    subdirectories, named '*.ged' in any case, sorted """
+    found = []
+    for root, _, names in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in names
+                     if name.lower().endswith('.ged'))
+    return sorted(found)
+
+
+def run_batch(filenames, rules=None, jobs=1, timeout=TIMEOUT, fused=False):
+    """ Validates each file in a worker process of its own, at most jobs at
+    a time. Yields an Outcome per file in the order of filenames, each as
+    soon as it and every file before it are done.
+
+    Workers are forked from this process, so they start with everything
+    imported. A file whose worker raises, dies or runs past timeout
+    seconds gets an Outcome saying so; the rest of the batch carries on.
+    """
+    if rules is None:
+        rules = RULES
+
+    pending = iter(enumerate(filenames))
+    running = {}  # pipe end -> (index, filename, process, deadline)
+    done = {}  # index -> Outcome, held until every earlier file is done
+    next_index = 0
+
+    try:
+        while True:
+            while len(running) < jobs:
+                task = next(pending, None)
+                if task is None:
+                    break
+                index, filename = task
+                reader, writer = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_validate_file,
+                    args=(filename, rules, fused, writer))
+                process.daemon = True
+                process.start()
+                # Only the worker holds the writing end, so its death ends
+                # the pipe
+                writer.close()
+                running[reader] = (index, filename, process,
+                                   time.time() + timeout)
+            if not running:
+                break
+
+            wait = min(deadline for _, _, _, deadline in running.values())
+            ready, _, _ = select.select(list(running), [], [],
+                                        max(0, wait - time.time()))
+            now = time.time()
+            for reader in list(running):
+                index, filename, process, deadline = running[reader]
+                if reader in ready:
+                    try:
+                        status, detail, findings = reader.recv()
+                    except (EOFError, IOError):
+                        process.join()
+                        status, detail, findings = \
+                            CRASHED, "exit code %s" % process.exitcode, []
+                elif now >= deadline:
+                    process.terminate()
+                    status, detail, findings = \
+                        TIMED_OUT, "after %d s" % timeout, []
+                else:
+                    continue
+                process.join()
+                reader.close()
+                del running[reader]
+                done[index] = Outcome(filename, status, detail, findings)
+
+            while next_index in done:
+                yield done.pop(next_index)
+                next_index += 1
+    finally:
+        for _, _, process, _ in running.values():
+            process.terminate()
+            process.join()
+
+
+def _validate_file(filename, rules, fused, writer):
+    """ Validates one file in a worker, sending (status, detail, findings)
+    back through writer """
+    # The parser reports stray DATE lines on stderr, which would bury the
+    # report under those of every file
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        db = GedcomDatabase(*parse_ged(filename))
+        result = (run_fused if fused else run_rules)(db, rules)
+        message = (OK, "", result.findings)
+    except Exception as error:
+        message = (FAILED, "%s: %s" % (type(error).__name__, error), [])
+    writer.send(message)
+    writer.close()
+
+
+def write_report(outcomes, rules=None, stream=None):
+    """ Writes each Outcome's findings as it arrives, then the files and
+    findings per user story and the files per status. Returns the Counter
+    of files per status. """
+    if rules is None:
+        rules = RULES
+    if stream is None:
+        stream = sys.stdout
+
+    stories = OrderedDict((rule.story, [0, 0]) for rule in rules
+                          if rule.severity != LISTING)  # files, findings
+    statuses = Counter()
+
+    stream.write("BATCH REPORT".center(80, ' ') + "\n\n")
+    for outcome in outcomes:
+        statuses[outcome.status] += 1
+        if outcome.status == OK:
+            severities = Counter(finding.severity
+                                 for finding in outcome.findings)
+            lines = ["%s: %d errors, %d anomalies\n"
+                     % (outcome.filename, severities[ERROR],
+                        severities[ANOMALY])]
+        else:
+            lines = ["%s: %s %s\n" % (outcome.filename,
+                                      outcome.status.upper(),
+                                      outcome.detail)]
+
+        for finding in outcome.findings:
+            lines.extend(table_rows(finding.severity, finding.story,
+                                    finding.message,
+                                    table_locations(finding.locations)))
+        for story, count in Counter(finding.story
+                                    for finding in outcome.findings).items():
+            stories[story][0] += 1
+            stories[story][1] += count
+        stream.write(''.join(lines))
+
+    lines = ["\n" + '-' * 80 + "\n",
+             "FINDINGS PER USER STORY".center(80, ' ') + "\n\n",
+             '{:6s} {:>8s} {:>10s}\n'.format('Story', 'Files', 'Findings'),
+             '-' * 80 + "\n"]
+    lines.extend('{:6s} {:>8d} {:>10d}\n'.format(story, files, findings)
+                 for story, (files, findings) in stories.items())
+    lines.append("\n%d files: %d validated, %d failed, %d crashed, "
+                 "%d timed out\n" % (sum(statuses.values()), statuses[OK],
+                                     statuses[FAILED], statuses[CRASHED],
+                                     statuses[TIMED_OUT]))
+    stream.write(''.join(lines))
+    stream.flush()
+    return statuses
@@ -0,0 +1,213 @@
+""" Python module for parsing GEDCOM geneaology files - parse cache
+
+    This file provides an on-disk cache of parsed GEDCOM files, so a file
+    that has not changed since it was last parsed is loaded from a snapshot
+    instead of being parsed again
+"""
+
+import hashlib
+import marshal
+import os
+import tempfile
+import time
+from operator import attrgetter
+
+from dates import DayRange
+from models import Individual, Family
+from parser import parse_ged
+
+DEFAULT_MAX_BYTES = 1024 * 2 ** 20  # 1 GB
+SUFFIX = '.snapshot'
+TEMP_SUFFIX = '.snapshot-part'  # A snapshot being written
+TEMP_MAX_AGE = 3600  # Seconds after which a partial snapshot is abandoned
+
+# Bumped whenever what a snapshot holds changes. The record fields are
+# stored too, so snapshots of models with other slots are never loaded.
+VERSION = 2
+HEADER = (VERSION, Individual.__slots__, Family.__slots__)
+
+_individual_row = attrgetter(*Individual.__slots__)
+_family_row = attrgetter(*Family.__slots__)
+
+# Positions of the dates in the rows; marshal cannot write a DayRange, so
+# its range is stored apart from the row
+_INDIVIDUAL_DATES = (Individual.__slots__.index('birthdate'),
+                     Individual.__slots__.index('death'))
+_FAMILY_DATES = (Family.__slots__.index('marriage'),
+                 Family.__slots__.index('divorce'))
+
+
+class ParseCache(object):
+    """ Snapshots of parsed files in a directory, keyed by the size and
+    SHA-1 of the file content, so a renamed or touched file is still found
+    and an edited one never is.
+
+    A snapshot holds the fields of every Individual and Family, and the
+    ranges of their dates that are not a single day, written
+    with marshal, which keeps interned strings interned and loads several
+    times faster than the file parses. The database indexes are not
+    stored; building them is quicker than loading them. The directory is
+    kept under max_bytes by removing the least recently used snapshots.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, filename):
+        """ Returns the cache key of a file: its size and content hash """
+        digest = hashlib.sha1()
+        with open(filename, 'rb') as ged_file:
+            for block in iter(lambda: ged_file.read(2 ** 20), ''):
+                digest.update(block)
+        return '%d-%s' % (os.path.getsize(filename), digest.hexdigest())
+
+    def path(self, key):
+        """ Returns the path of the snapshot for key """
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key):
+        """ Returns the (individuals, families) stored for key, or None if
+        there is no usable snapshot """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as snapshot:
+                header, individuals, families, ranges = \
+                    marshal.load(snapshot)
+        except IOError:
+            return None
+        except (EOFError, ValueError, TypeError):
+            # Truncated or not a snapshot
+            _remove(path)
+            return None
+        if header != HEADER:
+            _remove(path)
+            return None
+
+        # Mark the snapshot as recently used, unless a concurrent run has
+        # just evicted it
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        individuals = [_individual(row) for row in individuals]
+        families = [_family(row) for row in families]
+        for records, kept in zip((individuals, families), ranges):
+            for index, field, low, high in kept:
+                record = records[index]
+                setattr(record, field,
+                        DayRange(getattr(record, field), low, high))
+        return individuals, families
+
+    def store(self, key, individuals, families):
+        """ Writes the snapshot for key, then evicts snapshots until the
+        directory is within max_bytes """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        individual_rows, individual_ranges = _rows(
+            individuals, _individual_row, _INDIVIDUAL_DATES,
+            Individual.__slots__)
+        family_rows, family_ranges = _rows(
+            families, _family_row, _FAMILY_DATES, Family.__slots__)
+
+        # Written under a temporary name and renamed, so a concurrent run
+        # never loads half a snapshot
+        handle, temporary = tempfile.mkstemp(suffix=TEMP_SUFFIX,
+                                             dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as snapshot:
+                marshal.dump((HEADER, individual_rows, family_rows,
+                              (individual_ranges, family_ranges)),
+                             snapshot, 2)
+            os.rename(temporary, self.path(key))
+        except BaseException:
+            _remove(temporary)
+            raise
+        self.evict()
+
+    def evict(self):
+        """ Removes partial snapshots left by runs killed while writing
+        them, then the least recently used snapshots until the directory
+        holds at most max_bytes of them. Partial snapshots still being
+        written count towards max_bytes. """
+        snapshots = []
+        writing = 0  # Bytes of partial snapshots other runs are writing
+        abandoned = time.time() - TEMP_MAX_AGE
+        for name in os.listdir(self.directory):
+            if not name.endswith((SUFFIX, TEMP_SUFFIX)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed or renamed by a concurrent run
+                continue
+            if name.endswith(TEMP_SUFFIX):
+                if stat.st_mtime < abandoned:
+                    _remove(path)
+                else:
+                    writing += stat.st_size
+            else:
+                snapshots.append((stat.st_mtime, stat.st_size, name))
+
+        total = writing + sum(size for _, size, _ in snapshots)
+        for _, size, name in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            _remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def parse_cached(filename, cache, parse=parse_ged):
+    """ Returns the (individuals, families) of a GEDCOM file from cache,
+    parsing it with parse and storing the result on a miss """
+    key = cache.key(filename)
+    records = cache.load(key)
+    if records is None:
+        records = parse(filename)
+        cache.store(key, *records)
+    return records
+
+
+def _rows(records, row, dates, fields):
+    """ Returns the rows of records and the ranges of their dates, as
+    (record index, field, low, high), with each DayRange in the rows
+    replaced by its day """
+    rows = []
+    ranges = []
+    for index, record in enumerate(records):
+        values = row(record)
+        for position in dates:
+            value = values[position]
+            if type(value) is DayRange:
+                values = values[:position] + (int(value),) + \
+                    values[position + 1:]
+                ranges.append((index, fields[position], value.low,
+                               value.high))
+        rows.append(values)
+    return rows, ranges
+
+
+def _individual(row):
+    """ Returns the Individual stored as row """
+    indiv = Individual.__new__(Individual)
+    (indiv.uid, indiv.int_id, indiv.name, indiv.given, indiv.surname,
+     indiv.sex, indiv.birthdate, indiv.death, indiv.famc, indiv.fams) = row
+    return indiv
+
+
+def _family(row):
+    """ Returns the Family stored as row """
+    family = Family.__new__(Family)
+    (family.uid, family.int_id, family.marriage, family.husband, family.wife,
+     family.children, family.divorce) = row
+    return family
+
+
+def _remove(path):
+    """ Removes a file if it still exists """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
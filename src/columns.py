@@ -0,0 +1,52 @@
+""" Python module for parsing GEDCOM geneaology files - date columns
+
+    This file provides NumPy arrays of the event dates of a parsed GEDCOM
+    file so the per-record date user stories can be evaluated as vector
+    comparisons. Requires NumPy.
+"""
+
+import numpy
+
+
+def _column(records, field):
+    """ Returns the day ordinals of field over records as an int64 array """
+    return numpy.fromiter((getattr(record, field) for record in records),
+                          dtype=numpy.int64, count=len(records))
+
+
+class DateColumns(object):
+    """ Event dates of a GedcomDatabase, one array of day ordinals per
+    event, indexed by position in db.individuals / db.families. UNKNOWN
+    dates stay 0. Over a GedcomTable the arrays are its own int32 columns;
+    otherwise they are gathered from the records as int64. Day ordinals
+    stay far below the int32 limit, so the user stories compare and add
+    either kind alike.
+
+    Comparisons over the arrays give boolean masks; individuals_where and
+    families_where turn a mask back into the records it selects, in file
+    order.
+    """
+
+    def __init__(self, db):
+        self.individuals = db.individuals
+        self.families = db.families
+
+        if db.table is not None:
+            # Zero copy views of the table's own date arrays
+            self.birth = db.table.column('birth')
+            self.death = db.table.column('death')
+            self.marriage = db.table.column('marriage')
+            self.divorce = db.table.column('divorce')
+        else:
+            self.birth = _column(db.individuals, 'birthdate')
+            self.death = _column(db.individuals, 'death')
+            self.marriage = _column(db.families, 'marriage')
+            self.divorce = _column(db.families, 'divorce')
+
+    def individuals_where(self, mask):
+        """ Returns the Individuals selected by mask """
+        return [self.individuals[row] for row in numpy.flatnonzero(mask)]
+
+    def families_where(self, mask):
+        """ Returns the Families selected by mask """
+        return [self.families[row] for row in numpy.flatnonzero(mask)]
@@ -0,0 +1,158 @@
+""" Python module for parsing GEDCOM geneaology files - database
+
+    This file provides the indexed view of a parsed GEDCOM file that the
+    user stories use to look records up by id
+"""
+
+import sys
+from collections import OrderedDict
+
+from dates import earliest
+from graph import FamilyGraph
+
+OPEN_ENDED = sys.maxint  # End of a marriage that has not ended
+
+
+class GedcomDatabase(object):
+    """ Parsed individuals and families with uid indexes.
+
+    Built once after parsing so that finding a spouse, parent or child is a
+    dict lookup rather than a scan over every record.
+    """
+
+    def __init__(self, individuals, families, vectorised=True):
+        self.individuals = individuals
+        self.families = families
+        self.vectorised = vectorised  # Use NumPy date columns if installed
+        self.table = None  # GedcomTable the records are views of, if any
+        self._graph = None
+        self._date_columns = None
+        self._timelines = None
+        self._sibling_groups = None
+        self._surnames = None
+
+        self.individuals_by_uid = {}
+        self.families_by_uid = {}
+        self.spouse_families_by_uid = {}  # uid -> families uid is a spouse in
+        self.child_families_by_uid = {}  # uid -> families uid is a child in
+
+        for indiv in individuals:
+            self.individuals_by_uid[indiv.uid] = indiv
+
+        for family in families:
+            self.families_by_uid[family.uid] = family
+            for spouse in (family.husband, family.wife):
+                if spouse is not None:
+                    self.spouse_families_by_uid.setdefault(spouse, [])\
+                        .append(family)
+            for child in family.children:
+                self.child_families_by_uid.setdefault(child, [])\
+                    .append(family)
+
+    @classmethod
+    def from_table(cls, table, vectorised=True):
+        """ Creates a database over the row views of a GedcomTable. The
+        uid indexes look rows up in the table and the date columns share
+        its arrays, so no object is held per record. """
+        db = cls((), (), vectorised=vectorised)
+        db.individuals, db.families = table.records()
+        db.individuals_by_uid, db.families_by_uid, \
+            db.spouse_families_by_uid, db.child_families_by_uid = \
+            table.indexes()
+        db.table = table
+        return db
+
+    @property
+    def graph(self):
+        """ FamilyGraph of the database, built on first use """
+        if self._graph is None:
+            self._graph = FamilyGraph(self)
+        return self._graph
+
+    @property
+    def date_columns(self):
+        """ DateColumns of the database, built on first use. None when
+        vectorised is off or NumPy is not installed, in which case the
+        date user stories loop over the records instead. """
+        if self._date_columns is None and self.vectorised:
+            try:
+                # Import here so NumPy stays optional
+                from columns import DateColumns
+            except ImportError:
+                self.vectorised = False
+                return None
+            self._date_columns = DateColumns(self)
+        return self._date_columns
+
+    @property
+    def timelines(self):
+        """ Marriage timelines, built on first use: an OrderedDict of spouse
+        uid -> list of (start, end, family) sorted by start, where end is
+        the earliest day of the divorce or of the other spouse's death,
+        whichever comes first. Families without a marriage date are left
+        out. """
+        if self._timelines is None:
+            timelines = OrderedDict()
+            for family in self.families:
+                if not family.marriage:
+                    continue
+                for spouse, other in ((family.husband, family.wife),
+                                      (family.wife, family.husband)):
+                    if spouse is None:
+                        continue
+                    end = earliest(family.divorce) or OPEN_ENDED
+                    partner = self.individual(other)
+                    if partner and partner.death:
+                        end = min(end, earliest(partner.death))
+                    timelines.setdefault(spouse, []).append(
+                        (family.marriage, end, family))
+            for timeline in timelines.values():
+                timeline.sort(key=lambda marriage: marriage[0])
+            self._timelines = timelines
+        return self._timelines
+
+    @property
+    def sibling_groups(self):
+        """ Sibling groups, built on first use: a list of (family, children)
+        in family order, where children are the family's Individuals sorted
+        by birth date """
+        if self._sibling_groups is None:
+            self._sibling_groups = [
+                (family, sorted(self.children(family),
+                                key=lambda child: child.birthdate))
+                for family in self.families]
+        return self._sibling_groups
+
+    @property
+    def surnames(self):
+        """ Surname index, built on first use: surname -> Individuals with
+        that surname, in file order """
+        if self._surnames is None:
+            surnames = {}
+            for indiv in self.individuals:
+                surnames.setdefault(indiv.surname, []).append(indiv)
+            self._surnames = surnames
+        return self._surnames
+
+    def individual(self, uid):
+        """ Returns the Individual with the given uid or None """
+        return self.individuals_by_uid.get(uid)
+
+    def family(self, uid):
+        """ Returns the Family with the given uid or None """
+        return self.families_by_uid.get(uid)
+
+    def spouse_families(self, uid):
+        """ Returns the families in which uid is husband or wife, in file
+        order """
+        return self.spouse_families_by_uid.get(uid, [])
+
+    def child_families(self, uid):
+        """ Returns the families in which uid is a child, in file order """
+        return self.child_families_by_uid.get(uid, [])
+
+    def children(self, family):
+        """ Returns the Individuals that are children of family, skipping
+        pointers to individuals that do not exist """
+        return [self.individuals_by_uid[uid] for uid in family.children
+                if uid in self.individuals_by_uid]
@@ -0,0 +1,238 @@
+""" Python module for parsing GEDCOM geneaology files - dates
+
+    This file provides the GEDCOM date parsing for the GEDCOM parsing project
+"""
+
+from datetime import date, datetime, timedelta
+
+MONTHS = {'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+          'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12}
+
+# Qualifiers that mark a date as approximate but do not change its range
+APPROXIMATE = ('ABT', 'CAL', 'EST', 'INT')
+
+# Events are stored on the models as integer day ordinals (see
+# datetime.toordinal); UNKNOWN marks a missing or unparseable date. Ordinals
+# start at 1 so UNKNOWN is falsy, like None was. A date that is not a single
+# known day is stored as a DayRange.
+UNKNOWN = 0
+FIRST_DAY = 1  # Earliest day of a range with no start, e.g. BEF 1900
+LAST_DAY = date.max.toordinal()  # Latest day of a range with no end
+
+CACHE_LIMIT = 100000
+
+_cache = {}
+_ordinal_cache = {}
+
+
+class GedDate(datetime):
+    """ A GEDCOM date value.
+
+    The instance itself is the representative day of the date, so it can be
+    compared and used in arithmetic like any datetime. 'low' and 'high' hold
+    the earliest and latest days the date can refer to (None when the range
+    is open ended, e.g. BEF/AFT) and 'qualifier' holds the GEDCOM keyword the
+    date was written with ('BEF', 'ABT', 'BET', ...) or None for plain dates.
+    """
+    __slots__ = ('low', 'high', 'qualifier')
+
+    @classmethod
+    def from_range(cls, low, high, qualifier=None):
+        """ Creates a GedDate for the range low..high """
+        point = low if low is not None else high
+        date = cls(point.year, point.month, point.day)
+        date.low = low
+        date.high = high
+        date.qualifier = qualifier
+        return date
+
+    def is_exact(self):
+        """ True if the date refers to a single known day """
+        return self.qualifier is None and self.low == self.high
+
+
+class DayRange(int):
+    """ Day ordinal of a date that is not a single known day, such as
+    '1880', 'MAR 1880', 'BEF 1900' or 'BET 1880 AND 1885'.
+
+    The value is the representative day of the date, so it sorts, prints
+    and fills the NumPy date columns like any other date. 'low' and 'high'
+    are the first and last days it can refer to; the user stories compare
+    dates through earliest() and latest() so they only report what no day
+    in the ranges could satisfy. A DayRange equals only a DayRange with the
+    same range, never a plain ordinal.
+    """
+    __slots__ = ('low', 'high')
+
+    def __new__(cls, day, low, high):
+        self = int.__new__(cls, day)
+        self.low = low
+        self.high = high
+        return self
+
+    def __eq__(self, other):
+        return type(other) is DayRange and int(self) == int(other) and \
+            self.low == other.low and self.high == other.high
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((int(self), self.low, self.high))
+
+    def __reduce__(self):
+        return (DayRange, (int(self), self.low, self.high))
+
+    def __repr__(self):
+        return 'DayRange(%d, %d, %d)' % (self, self.low, self.high)
+
+
+def earliest(day):
+    """ Returns the first day ordinal a stored date can refer to """
+    return day.low if type(day) is DayRange else day
+
+
+def latest(day):
+    """ Returns the last day ordinal a stored date can refer to """
+    return day.high if type(day) is DayRange else day
+
+
+def parse_date(text):
+    """ Parses the argument of a GEDCOM 'DATE' line. Returns a GedDate or
+    None if the date cannot be understood. Results are memoized as dates
+    repeat heavily in genealogy files."""
+    try:
+        return _cache[text]
+    except KeyError:
+        pass
+
+    try:
+        # Date phrases in parentheses carry no machine readable date
+        date = _parse(text.split('(')[0].upper().split())
+    except (ValueError, KeyError, IndexError, OverflowError):
+        date = None
+
+    if len(_cache) >= CACHE_LIMIT:
+        _cache.clear()
+    _cache[text] = date
+    return date
+
+
+def parse_ordinal(text):
+    """ Parses the argument of a GEDCOM 'DATE' line into the day ordinal of
+    its representative day, as a DayRange if it can refer to more than one
+    day. Returns UNKNOWN if the date cannot be understood. """
+    try:
+        return _ordinal_cache[text]
+    except KeyError:
+        pass
+
+    ged_date = parse_date(text)
+    if ged_date is None:
+        ordinal = UNKNOWN
+    else:
+        ordinal = ged_date.toordinal()
+        low = ged_date.low.toordinal() if ged_date.low is not None \
+            else FIRST_DAY
+        high = ged_date.high.toordinal() if ged_date.high is not None \
+            else LAST_DAY
+        if low != high:
+            ordinal = DayRange(ordinal, low, high)
+
+    if len(_ordinal_cache) >= CACHE_LIMIT:
+        _ordinal_cache.clear()
+    _ordinal_cache[text] = ordinal
+    return ordinal
+
+
+def today():
+    """ Returns the day ordinal of the current date """
+    return date.today().toordinal()
+
+
+def years_ago(years, ordinal=None):
+    """ Returns the day ordinal of the same calendar day 'years' years
+    before 'ordinal' (default today). 29 FEB maps to 28 FEB. """
+    day = date.fromordinal(ordinal) if ordinal else date.today()
+    try:
+        return day.replace(year=day.year - years).toordinal()
+    except ValueError:
+        return day.replace(year=day.year - years, day=28).toordinal()
+
+
+def to_string(ordinal):
+    """ Formats a day ordinal as YYYY-MM-DD, or 'None' if UNKNOWN """
+    if ordinal == UNKNOWN:
+        return 'None'
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _parse(words):
+    """ Parses a split, upper-cased GEDCOM date value """
+    # Drop a leading calendar escape such as @#DGREGORIAN@ before the words
+    # are counted
+    if words and words[0].startswith('@#'):
+        words = words[1:]
+    keyword = words[0]
+
+    if keyword in APPROXIMATE:
+        low, high = _parse_range(words[1:])
+        return GedDate.from_range(low, high, keyword)
+    if keyword == 'BEF':
+        low, _ = _parse_range(words[1:])
+        return GedDate.from_range(None, low - timedelta(days=1), keyword)
+    if keyword == 'AFT':
+        _, high = _parse_range(words[1:])
+        return GedDate.from_range(high + timedelta(days=1), None, keyword)
+    if keyword in ('BET', 'FROM'):
+        end_word = 'AND' if keyword == 'BET' else 'TO'
+        if end_word in words:
+            split = words.index(end_word)
+            low, _ = _parse_range(words[1:split])
+            _, high = _parse_range(words[split + 1:])
+            if high < low:
+                raise ValueError("Date range ends before it starts")
+        else:
+            low, high = _parse_range(words[1:])
+            if keyword == 'FROM':
+                # 'FROM x' with no end is open-ended
+                high = None
+        return GedDate.from_range(low, high, keyword)
+    if keyword == 'TO':
+        # 'TO x' with no start is open-ended
+        _, high = _parse_range(words[1:])
+        return GedDate.from_range(None, high, keyword)
+
+    # Anything after 'D MON YYYY' is trailing noise
+    low, high = _parse_range(words[:3])
+    return GedDate.from_range(low, high)
+
+
+def _parse_range(words):
+    """ Parses a single (possibly partial) date into its first and last day.
+    Accepts 'D MON YYYY', 'MON YYYY' and 'YYYY'."""
+
+    # Drop calendar escapes such as @#DGREGORIAN@
+    if words and words[0].startswith('@#'):
+        words = words[1:]
+
+    # Dual dates ('1750/51') use the first year
+    year = int(words[-1].split('/')[0])
+
+    if len(words) == 1:
+        return datetime(year, 1, 1), datetime(year, 12, 31)
+
+    month = MONTHS[words[-2]]
+    if len(words) == 2:
+        first = datetime(year, month, 1)
+        if month == 12:
+            last = datetime(year, 12, 31)
+        else:
+            last = datetime(year, month + 1, 1) - timedelta(days=1)
+        return first, last
+
+    if len(words) == 3:
+        day = datetime(year, month, int(words[0]))
+        return day, day
+
+    raise ValueError("Unrecognised date")
@@ -0,0 +1,47 @@
+""" Python module for parsing GEDCOM geneaology files - findings
+
+    This file provides the records the user stories report errors and
+    anomalies as, and the result of a validation run that collects them
+"""
+
+from collections import OrderedDict, namedtuple
+
+ERROR = "ERROR"
+ANOMALY = "ANOMALY"
+LISTING = "LISTING"  # Severity of user stories that list records
+
+# One error or anomaly: the user story that found it, its severity, a
+# description and the uids of the records involved
+Finding = namedtuple('Finding', ('story', 'severity', 'message', 'locations'))
+
+
+class ValidationResult(object):
+    """ The findings of one validation run.
+
+    Each run gets its own result, so nothing is kept between runs and
+    several validations can run in one process.
+    """
+
+    def __init__(self):
+        self.findings = []
+        self.passed = OrderedDict()  # story -> True if it found nothing
+        self.listings = OrderedDict()  # story -> (title, Individuals)
+
+    def add(self, finding):
+        """ Records a Finding """
+        self.findings.append(finding)
+
+    def error(self, story, message, locations):
+        """ Records an error found by story """
+        self.add(Finding(story, ERROR, message, locations))
+
+    def anomaly(self, story, message, locations):
+        """ Records an anomaly found by story """
+        self.add(Finding(story, ANOMALY, message, locations))
+
+    def locations(self, severity):
+        """ Returns the uids involved in the findings of severity, in the
+        order found """
+        return [uid for finding in self.findings
+                if finding.severity == severity
+                for uid in finding.locations]
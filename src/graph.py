@@ -0,0 +1,171 @@
+""" Python module for parsing GEDCOM geneaology files - relationship graph
+
+    This file provides the parent/child graph of a parsed GEDCOM file that
+    the kinship user stories share
+"""
+
+EMPTY = frozenset()
+
+
+class FamilyGraph(object):
+    """ Parent/child adjacency between individuals with memoized ancestor
+    and descendant closures.
+
+    Closures are computed once per person and reused by every later query,
+    so checking every marriage against the descendants of a spouse is near
+    linear overall. With bitsets=True closures are stored as integer
+    bitmasks over a person index instead of frozensets of uids, which is
+    more compact for dense trees.
+    """
+
+    def __init__(self, db, bitsets=False):
+        self.bitsets = bitsets
+        self.parents = {}  # uid -> parent uids
+        self.children = {}  # uid -> child uids
+
+        for family in db.families:
+            for child in family.children:
+                for parent in (family.husband, family.wife):
+                    if parent is not None:
+                        self.parents.setdefault(child, []).append(parent)
+                        self.children.setdefault(parent, []).append(child)
+
+        self._descendants = {}
+        self._ancestors = {}
+
+        # Bit positions for the bitset representation
+        self._index = {}
+        self._uids = []
+
+    def descendants(self, uid):
+        """ Returns the set of uids descended from uid """
+        return self._as_set(self._closure(uid, self.children,
+                                          self._descendants))
+
+    def ancestors(self, uid):
+        """ Returns the set of uids uid is descended from """
+        return self._as_set(self._closure(uid, self.parents, self._ancestors))
+
+    def is_descendant(self, uid, ancestor):
+        """ True if uid is descended from ancestor """
+        closure = self._closure(ancestor, self.children, self._descendants)
+        if self.bitsets:
+            index = self._index.get(uid)
+            return index is not None and bool(closure >> index & 1)
+        return uid in closure
+
+    def cycles(self):
+        """ Returns every ancestry cycle as a list of the uids involved.
+
+        Finds the strongly connected components of the parent -> child
+        graph with a single iterative pass of Tarjan's algorithm; any
+        component of more than one person, or a person who is their own
+        child, is a cycle.
+        """
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+
+        for root in self.children:
+            if root in index:
+                continue
+
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.children.get(root, ())))]
+
+            while work:
+                node, edges = work[-1]
+                for nxt in edges:
+                    if nxt not in index:
+                        index[nxt] = low[nxt] = len(index)
+                        stack.append(nxt)
+                        on_stack.add(nxt)
+                        work.append((nxt, iter(self.children.get(nxt, ()))))
+                        break
+                    elif nxt in on_stack:
+                        low[node] = min(low[node], index[nxt])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or \
+                                node in self.children.get(node, ()):
+                            cycles.append(component)
+
+        return cycles
+
+    def _bit(self, uid):
+        """ Returns the bitmask with only uid's bit set """
+        index = self._index.get(uid)
+        if index is None:
+            index = self._index[uid] = len(self._uids)
+            self._uids.append(uid)
+        return 1 << index
+
+    def _as_set(self, closure):
+        """ Converts a closure to a set of uids """
+        if not self.bitsets:
+            return closure
+        uids = set()
+        index = 0
+        while closure:
+            if closure & 1:
+                uids.add(self._uids[index])
+            closure >>= 1
+            index += 1
+        return uids
+
+    def _closure(self, uid, adjacency, memo):
+        """ Returns the transitive closure of uid over adjacency, filling
+        memo for uid and everything reachable from it.
+
+        Walks iteratively so deep pedigrees do not hit the recursion limit.
+        A person reached again while still on the walk (an ancestry cycle)
+        is not followed a second time, so corrupt files terminate.
+        """
+        if uid in memo:
+            return memo[uid]
+
+        on_walk = set([uid])
+        stack = [(uid, iter(adjacency.get(uid, ())))]
+        while stack:
+            node, edges = stack[-1]
+            for nxt in edges:
+                if nxt not in memo and nxt not in on_walk:
+                    on_walk.add(nxt)
+                    stack.append((nxt, iter(adjacency.get(nxt, ()))))
+                    break
+            else:
+                stack.pop()
+                on_walk.discard(node)
+                memo[node] = self._combine(adjacency.get(node, ()), memo)
+
+        return memo[uid]
+
+    def _combine(self, neighbours, memo):
+        """ Unions each neighbour with its memoized closure """
+        if self.bitsets:
+            closure = 0
+            for nxt in neighbours:
+                closure |= self._bit(nxt) | memo.get(nxt, 0)
+            return closure
+
+        closure = set()
+        for nxt in neighbours:
+            closure.add(nxt)
+            closure |= memo.get(nxt, EMPTY)
+        return frozenset(closure)
@@ -0,0 +1,300 @@
+""" Python module for parsing GEDCOM geneaology files - incremental validation
+
+    This file re-validates a GEDCOM file after edits by re-parsing only the
+    level 0 blocks whose content changed and re-checking only the records
+    those blocks touch
+"""
+
+import gc
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+
+from database import GedcomDatabase
+from findings import LISTING, ValidationResult
+from models import Individual
+from parser import block_ranges, parse_block
+from user_stories import RULES
+
+
+class IncrementalValidation(object):
+    """ Validation of one GEDCOM file that is kept up to date as the file
+    changes.
+
+    Every level 0 block is identified by the SHA-1 of its bytes. On each
+    update() the blocks are hashed again: a block seen before keeps its
+    parsed record, and only new or edited blocks are parsed. The records
+    of the blocks that were added or removed are the changed records.
+
+    The per-record checks of the user stories (Rule.checks) then run only
+    on the records that read a changed record: the changed records
+    themselves, the individuals whose parents' family or parents changed,
+    and the families whose spouses or children changed. Their findings are
+    kept per record, so the findings of every other record are reused.
+
+    A user story over the whole file runs again unless the only changes
+    are edits to records that keep their uid and the fields edited are
+    none of those it reads (Rule.fields). Blocks that moved, or records
+    added, removed or given another uid, run every story again. The result
+    is the same as validating the file from scratch.
+
+    The blocks and findings are kept in memory only, so the previous run
+    is the previous update() of the same object; nothing is written next
+    to the ParseCache snapshots.
+    """
+
+    def __init__(self, filename, rules=None):
+        self.filename = filename
+        self.rules = RULES if rules is None else rules
+        self.db = None
+        self.result = None
+        self.parsed = 0  # Blocks parsed by the last update
+        self.checked = 0  # Records checked by the last update
+
+        self._blocks = []  # (digest, record or None) in file order
+        self._outcomes = {}  # record -> (failed stories, slotted findings)
+        self._slots = []  # Story of each per-record check, in report order
+        self._whole = {}  # story -> (passed, findings)
+
+    def update(self):
+        """ Brings the validation up to date with the file. Returns the
+        ValidationResult, unchanged if the file is. """
+        with _gc_paused():
+            return self._update()
+
+    def _update(self):
+        """ update() with the garbage collector paused """
+        blocks, added, removed, moved = self._read()
+        self._blocks = blocks
+        self.checked = 0
+        if self.result is not None and not (added or removed or moved):
+            return self.result
+
+        individuals = []
+        families = []
+        for _, record in blocks:
+            if isinstance(record, Individual):
+                individuals.append(record)
+            elif record is not None:
+                families.append(record)
+        self.db = db = GedcomDatabase(individuals, families)
+
+        for record in removed:
+            self._outcomes.pop(record, None)
+
+        if self.result is None or moved:
+            # Everything is checked on the first run, and when records moved
+            # the order of the findings, and which of several records
+            # sharing a uid is found by it, may have changed
+            self._check(db, families, individuals)
+            fields = None
+        else:
+            self._check(db, *_touched(db, added + removed))
+            fields = _edited_fields(added, removed)
+
+        whole = [rule for rule in self.rules
+                 if rule.checks is None and rule.severity != LISTING]
+        for rule in whole:
+            if fields is not None and rule.fields is not None and \
+                    fields.isdisjoint(rule.fields):
+                continue
+            result = ValidationResult()
+            self._whole[rule.story] = (rule.check(db, result),
+                                       result.findings)
+
+        self.result = self._collect(db)
+        return self.result
+
+    def _read(self):
+        """ Hashes the level 0 blocks of the file, parsing those not seen
+        before. Returns the blocks, the records parsed, the records of
+        blocks no longer in the file and whether the records kept are in
+        another order. """
+        # Records of the previous blocks by digest, to be claimed in turn
+        # by identical blocks, and where each was
+        previous = {}
+        position = {}
+        for index, (digest, record) in enumerate(self._blocks):
+            previous.setdefault(digest, []).append(record)
+            position[record] = index
+
+        blocks = []
+        added = []
+        moved = False
+        last = -1
+        self.parsed = 0
+        with open(self.filename, 'rb') as ged_file:
+            if os.fstat(ged_file.fileno()).st_size == 0:
+                buffer = ''
+            else:
+                buffer = mmap.mmap(ged_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+            try:
+                for start, end in block_ranges(buffer):
+                    digest = hashlib.sha1(buffer[start:end]).digest()
+                    same = previous.get(digest)
+                    if same:
+                        record = same.pop(0)
+                        if record is not None:
+                            moved = moved or position[record] < last
+                            last = position[record]
+                    else:
+                        record = parse_block(buffer, start, end)
+                        self.parsed += 1
+                        if record is not None:
+                            added.append(record)
+                    blocks.append((digest, record))
+            finally:
+                if buffer:
+                    buffer.close()
+
+        removed = [record for records in previous.values()
+                   for record in records if record is not None]
+        return blocks, added, removed, moved
+
+    def _check(self, db, families, individuals):
+        """ Runs the per-record checks on families and individuals, keeping
+        each record's failed stories and findings """
+        sink = ValidationResult()
+        family_checks = []
+        individual_checks = []
+        self._slots = []
+        for rule in self.rules:
+            if rule.checks is not None and rule.severity != LISTING:
+                for_individuals, for_families = rule.checks(db, sink)
+                # A story reports each of its checks over every record in
+                # turn, family checks first
+                for checks, kind in ((for_families, family_checks),
+                                     (for_individuals, individual_checks)):
+                    for check in checks:
+                        kind.append((len(self._slots), rule.story, check))
+                        self._slots.append(rule.story)
+
+        for family in families:
+            husband = db.individual(family.husband)
+            wife = db.individual(family.wife)
+            self._run(family, (family, husband, wife), family_checks, sink)
+
+        for individual in individuals:
+            parents = db.family(individual.famc[0]) \
+                if individual.famc else None
+            self._run(individual, (individual, parents), individual_checks,
+                      sink)
+
+        self.checked = len(families) + len(individuals)
+
+    def _run(self, record, arguments, checks, sink):
+        """ Runs checks on record, keeping the stories it failed and the
+        findings the checks reported to sink, each with the slot of the
+        check that found it """
+        failed = []
+        findings = []
+        for slot, story, check in checks:
+            start = len(sink.findings)
+            if not check(*arguments):
+                failed.append(story)
+            findings.extend((slot, finding)
+                            for finding in sink.findings[start:])
+        del sink.findings[:]
+
+        if failed or findings:
+            self._outcomes[record] = (failed, findings)
+        else:
+            self._outcomes.pop(record, None)
+
+    def _collect(self, db):
+        """ Returns the ValidationResult of the kept outcomes, in the order
+        validation of the whole file reports them: by rule, then by check,
+        then in file order """
+        slots = [[] for _ in self._slots]
+        failed = set()
+        for record in db.families + db.individuals:
+            outcome = self._outcomes.get(record)
+            if outcome is not None:
+                failed.update(outcome[0])
+                for slot, finding in outcome[1]:
+                    slots[slot].append(finding)
+
+        per_record = dict((story, []) for story in self._slots)
+        for story, findings in zip(self._slots, slots):
+            per_record[story].extend(findings)
+
+        result = ValidationResult()
+        for rule in self.rules:
+            if rule.severity == LISTING:
+                result.listings[rule.story] = (rule.title, rule.check(db))
+            elif rule.checks is not None:
+                result.passed[rule.story] = rule.story not in failed
+                result.findings.extend(per_record[rule.story])
+            else:
+                passed, findings = self._whole[rule.story]
+                result.passed[rule.story] = passed
+                result.findings.extend(findings)
+        return result
+
+
+@contextmanager
+def _gc_paused():
+    """ Pauses the cyclic garbage collector. An update allocates a tuple or
+    list per block and record, none of them in cycles, and each collection
+    they set off walks every object of the kept database: about 40% of an
+    update on a 200k individual file. """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _edited_fields(added, removed):
+    """ Returns the names of the fields that differ between the removed and
+    the added records of each uid, or None unless every uid lost exactly
+    one record and gained one of the same kind """
+    before = dict(((type(record), record.uid), record) for record in removed)
+    after = dict(((type(record), record.uid), record) for record in added)
+    if len(before) != len(removed) or len(after) != len(added) or \
+            set(before) != set(after):
+        return None
+
+    fields = set()
+    for key, record in after.items():
+        fields.update(field for field in record.__slots__
+                      if getattr(record, field) != getattr(before[key], field))
+    return fields
+
+
+def _touched(db, changed):
+    """ Returns the families and individuals of db, in file order, whose
+    per-record checks read one of the changed records: the records with
+    their uids, individuals whose parents' family or parents changed, and
+    families whose spouses or children changed """
+    individual_uids = set()
+    family_uids = set()
+    for record in changed:
+        if isinstance(record, Individual):
+            individual_uids.add(record.uid)
+        else:
+            family_uids.add(record.uid)
+
+    families = []
+    for family in db.families:
+        if family.uid in family_uids or family.husband in individual_uids \
+                or family.wife in individual_uids \
+                or not individual_uids.isdisjoint(family.children):
+            families.append(family)
+
+    individuals = []
+    for individual in db.individuals:
+        touched = individual.uid in individual_uids
+        if not touched and individual.famc:
+            parents = db.family(individual.famc[0])
+            touched = individual.famc[0] in family_uids or (
+                parents is not None and (parents.husband in individual_uids or
+                                         parents.wife in individual_uids))
+        if touched:
+            individuals.append(individual)
+
+    return families, individuals
@@ -4,15 +4,25 @@
 """
 
 import re
+from dates import UNKNOWN
 
 VALID_TAGS = ['INDI', 'NAME', 'SEX', 'BIRT', 'DEAT', 'FAMC', 'FAMS', 'FAM',
               'MARR', 'HUSB', 'WIFE', 'CHIL', 'DIV', 'DATE', 'HEAD', 'TRLR',
               'NOTE']
 
+ID_PATTERN = re.compile(r'\d+')
+
+
+def extract_id(uid):
+    """ Returns the numeric part of a GEDCOM xref such as '@I12@' """
+    return int(ID_PATTERN.search(uid).group())
+
 
 class Gedline(object):
     """Class for a single line of a GEDCOM file"""
 
+    __slots__ = ('level', 'tag', 'xref', 'args')
+
     def __init__(self, line):
         self.level = None
         self.tag = None
@@ -56,13 +66,18 @@ class Gedline(object):
 class Individual(object):
     """ Class for an individual """
 
+    __slots__ = ('uid', 'int_id', 'name', 'given', 'surname', 'sex',
+                 'birthdate', 'death', 'famc', 'fams')
+
     def __init__(self, uid):
-        self.uid = uid
-        self.int_id = int(re.search(r'\d+', uid).group())
+        self.uid = intern(uid)
+        self.int_id = extract_id(uid)
         self.name = None  # Name of individual
+        self.given = ""  # Given name of individual
+        self.surname = ""  # Surname of individual
         self.sex = None  # Sex of individual (M or F)
-        self.birthdate = None  # Birth date of individual
-        self.death = None  # Date of death of individual
+        self.birthdate = UNKNOWN  # Birth date of individual (day ordinal)
+        self.death = UNKNOWN  # Date of death of individual (day ordinal)
         self.famc = []  # Family where individual is a child
         self.fams = []  # Family where individual is spouse
 
@@ -70,11 +85,14 @@ class Individual(object):
 class Family(object):
     """ Class for a family """
 
+    __slots__ = ('uid', 'int_id', 'marriage', 'husband', 'wife', 'children',
+                 'divorce')
+
     def __init__(self, uid):
-        self.uid = uid
-        self.int_id = int(re.search(r'\d+', uid).group())
-        self.marriage = None  # marriage event for family
+        self.uid = intern(uid)
+        self.int_id = extract_id(uid)
+        self.marriage = UNKNOWN  # marriage date for family (day ordinal)
         self.husband = None  # pointer for husband in family
         self.wife = None  # pointer for wife in family
         self.children = []  # pointer for child in family
-        self.divorce = None  # divorce event in family
+        self.divorce = UNKNOWN  # divorce date in family (day ordinal)
@@ -0,0 +1,56 @@
+""" Python module for parsing GEDCOM geneaology files - names
+
+    This file provides the personal name handling for the GEDCOM parsing
+    project
+"""
+
+import re
+
+# 'Given /Surname/ suffix' - the surname is delimited by slashes
+SURNAME_PATTERN = re.compile(r'/([^/]*)/?')
+
+CACHE_LIMIT = 100000
+
+_split_cache = {}
+_normal_cache = {}
+
+
+def split_name(name):
+    """ Splits the arguments of a GEDCOM 'NAME' line into an interned
+    (given name, surname) pair. Memoized as names repeat across a file. """
+    text = ' '.join(name)
+    try:
+        return _split_cache[text]
+    except KeyError:
+        pass
+
+    match = SURNAME_PATTERN.search(text)
+    if match:
+        given = text[:match.start()].strip()
+        surname = match.group(1).strip()
+    else:
+        given = text.strip()
+        surname = ""
+    parts = (intern(given), intern(surname))
+
+    if len(_split_cache) >= CACHE_LIMIT:
+        _split_cache.clear()
+    _split_cache[text] = parts
+    return parts
+
+
+def normalise_name(name):
+    """ Returns a name list as a single lower case string with the surname
+    slashes and repeated whitespace removed, for duplicate matching """
+    text = ' '.join(name)
+    try:
+        return _normal_cache[text]
+    except KeyError:
+        pass
+
+    normal = intern(' '.join(text.replace('/', ' ').lower().split()))
+
+    if len(_normal_cache) >= CACHE_LIMIT:
+        _normal_cache.clear()
+    _normal_cache[text] = normal
+    return normal
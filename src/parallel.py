@@ -0,0 +1,65 @@
+""" Python module for parsing GEDCOM geneaology files - parallel validation
+
+    This file runs the user stories of a validation across a pool of worker
+    processes. The workers are forked once the database is built, so they
+    share it with the parent instead of each task receiving a pickled copy.
+"""
+
+import multiprocessing
+from collections import defaultdict
+
+from findings import LISTING, ValidationResult
+
+# The database and rules of the run in progress, inherited by the forked
+# workers
+_db = None
+_rules = None
+
+
+def run_parallel(db, rules, jobs, reporter=None):
+    """ Runs the checking rules on jobs worker processes, one rule per task.
+    Findings are merged in rule order, and each rule's are passed to
+    reporter as soon as it and every rule before it have finished, so the
+    result is the same as run_rules. Requires fork. Returns a
+    ValidationResult. """
+    global _db, _rules
+
+    checking = [rule for rule in rules if rule.severity != LISTING]
+
+    # An index several rules use is built once here and shared with every
+    # worker; one only a single rule uses is built by the worker running it
+    users = defaultdict(int)
+    for rule in checking:
+        for index in rule.indexes:
+            users[index] += 1
+    for index, count in users.items():
+        if count > 1:
+            getattr(db, index)
+
+    result = ValidationResult()
+    _db, _rules = db, checking
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for story, passed, findings in pool.imap(_run_rule,
+                                                 range(len(checking))):
+            result.passed[story] = passed
+            result.findings.extend(findings)
+            if reporter is not None:
+                reporter.write(findings)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _db = _rules = None
+
+    return result
+
+
+def _run_rule(index):
+    """ Runs one rule in a worker. Returns (story, passed, findings). """
+    rule = _rules[index]
+    result = ValidationResult()
+    passed = rule.check(_db, result)
+    return rule.story, passed, result.findings
@@ -2,121 +2,295 @@
 
     This file provides the parsing utility for the GEDCOM parsing project
 """
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+
 from models import Gedline, Individual, Family
-from datetime import datetime
+from dates import parse_ordinal
+from names import split_name
+from table import GedcomTable
+
+# <level> <tag or xref> [<arguments>]; a level 0 line with an xref carries
+# its tag among the arguments
+LINE_PATTERN = re.compile(r'^(\d+) (\S+)(?: ([^\r\n]*))?\r?$', re.M)
+BLOCK_PATTERN = re.compile(r'^0 ', re.M)  # Start of a level 0 block
+
+# The tags parse_individual_line and parse_family_line act on. Arguments
+# of any other line are never sliced out of the file.
+INDIVIDUAL_TAGS = frozenset(['NAME', 'GIVN', 'SURN', 'SEX', 'BIRT', 'DEAT',
+                             'FAMC', 'FAMS', 'DATE'])
+FAMILY_TAGS = frozenset(['MARR', 'DIV', 'HUSB', 'WIFE', 'CHIL', 'DATE'])
 
 
 def parse_ged(filename):
     """ Parses a GEDCOM file. Returns list of individual instances and family
     instances."""
+    return _collect(iter_records(filename))
+
+
+def parse_parallel(filename, jobs):
+    """ Parses a GEDCOM file on jobs worker processes. The file is split
+    into one byte range per job, each starting on a level 0 line, and the
+    records of every range are merged back in file order. Returns the same
+    as parse_ged. """
+    ranges = split_ranges(filename, jobs)
+    if len(ranges) < 2:
+        return parse_ged(filename)
+
     individuals = []
     families = []
-    gedlist = []
+    pool = multiprocessing.Pool(len(ranges))
+    try:
+        tasks = [(filename, start, end) for start, end in ranges]
+        for chunk_individuals, chunk_families in pool.imap(_parse_range,
+                                                           tasks):
+            individuals.extend(chunk_individuals)
+            families.extend(chunk_families)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return (individuals, families)
+
+
+def split_ranges(filename, parts):
+    """ Splits a GEDCOM file into at most parts byte ranges of about equal
+    size. Every range but the first starts on a line beginning with '0 ', so
+    no record is divided between two ranges. Returns (start, end) pairs. """
+    size = os.path.getsize(filename)
+    starts = [0]
+    with open(filename, 'rb') as ged_file:
+        for part in xrange(1, parts):
+            start = _next_record(ged_file, size * part // parts)
+            if starts[-1] < start < size:
+                starts.append(start)
+    return zip(starts, starts[1:] + [size])
+
+
+def _next_record(ged_file, offset):
+    """ Returns the offset of the first level 0 line starting at or after
+    offset, or the end of the file if there is none """
+    if offset == 0:
+        return 0
+    # Finish the line offset falls in; the next one starts at or after it
+    ged_file.seek(offset - 1)
+    position = offset - 1 + len(ged_file.readline())
+    for line in iter(ged_file.readline, ''):
+        if line.startswith('0 '):
+            break
+        position += len(line)
+    return position
 
-    lines = [line.rstrip('\n\r') for line in open(filename)]
 
-    # Parse into gedline class
-    for line in lines:
-        current_ged = Gedline(line)
-        gedlist.append(current_ged)
+def _parse_range(task):
+    """ Parses one byte range in a worker. Returns (individuals,
+    families). """
+    filename, start, end = task
+    return _collect(iter_mapped_records(filename, start, end))
 
-    # Parsing of 0 level tags
-    for index, gedline in enumerate(gedlist):
-        if gedline.tag == 'INDI':
-            individuals.append(parse_single_individual(gedlist, index,
-                                                       gedline.xref))
-        if gedline.tag == 'FAM':
-            families.append(parse_single_family(gedlist, index, gedline.xref))
+
+def _collect(records):
+    """ Separates parsed records into (individuals, families) """
+    individuals = []
+    families = []
+
+    for record in records:
+        if isinstance(record, Individual):
+            individuals.append(record)
+        else:
+            families.append(record)
 
     return (individuals, families)
 
 
-def parse_single_individual(gedlist, index, xref):
+def parse_table(source):
+    """ Parses a GEDCOM file given either a path or an open file object
+    into a columnar GedcomTable. Only one record is held as an object at a
+    time. """
+    table = GedcomTable()
+
+    for record in iter_records(source):
+        if isinstance(record, Individual):
+            table.add_individual(record)
+        else:
+            table.add_family(record)
+
+    return table
+
+
+def iter_records(source):
+    """ Lazily parses a GEDCOM file given either a path or an open file
+    object. Yields each Individual and Family as soon as its level 0 block
+    is closed.
+
+    The file is walked exactly once: every line is dispatched to the record
+    opened by the most recent level 0 'INDI' or 'FAM' line, so parsing is
+    linear in the size of the file and only the record being assembled is
+    held in memory. A path is read through iter_mapped_records.
     """
-    Parses a single individual from a GEDCOM giving the starting index of an
-    'INDI' tag. Returns an Individual class
+    if isinstance(source, basestring):
+        for record in iter_mapped_records(source):
+            yield record
+        return
+
+    matches = (LINE_PATTERN.match(line) for line in source)
+    for record in _assemble(match for match in matches if match is not None):
+        yield record
+
+
+def iter_mapped_records(filename, start=0, end=None):
+    """ Lazily parses the records of a GEDCOM file between the byte offsets
+    start and end, start being the beginning of a line.
+
+    The file is memory mapped and tokenized in place: each line is matched
+    where it lies, and only the tag of a line, and the arguments of a line
+    whose tag the record being assembled uses, are copied out as strings.
+    Lines such as the HEAD block, sources and notes cost one match each.
     """
-    indiv = Individual(xref)
+    with open(filename, 'rb') as ged_file:
+        if os.fstat(ged_file.fileno()).st_size == 0:
+            return
+        buffer = mmap.mmap(ged_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if end is None:
+                end = len(buffer)
+            for record in _assemble(LINE_PATTERN.finditer(buffer, start,
+                                                          end)):
+                yield record
+        finally:
+            buffer.close()
+
+
+def block_ranges(buffer):
+    """ Returns the (start, end) byte offsets of every level 0 block, a
+    level 0 line and the lines under it, of a GEDCOM file held in buffer
+    (a string or memory map) """
+    starts = [match.start() for match in BLOCK_PATTERN.finditer(buffer)]
+    return zip(starts, starts[1:] + [len(buffer)])
+
+
+def parse_block(buffer, start, end):
+    """ Returns the Individual or Family of the level 0 block between start
+    and end of buffer, or None for any other block """
+    for record in _assemble(LINE_PATTERN.finditer(buffer, start, end)):
+        return record
+    return None
+
 
+def _assemble(matches):
+    """ Assembles Individuals and Families from LINE_PATTERN matches, one
+    per line. Yields each record as its level 0 block closes. """
+    record = None  # Individual or Family currently being assembled
     date_type = None
-    for gedline in gedlist[index + 1:]:
-        if gedline.level == 0:
-            break
-        if gedline.tag == "NAME":
-            indiv.name = gedline.args
-        if gedline.tag == "SEX":
-            indiv.sex = gedline.args[0]
-        if gedline.tag == "BIRT":
-            date_type = "BIRT"
-        if gedline.tag == "DEAT":
-            date_type = "DEAT"
-        if gedline.tag == "FAMC":
-            indiv.famc.append(gedline.args[0])
-        if gedline.tag == "FAMS":
-            indiv.fams.append(gedline.args[0])
-
-        # This assumes the following date tag corresponds to prev tag
-        if gedline.tag == "DATE":
-            if date_type == "BIRT":
-                # Store birthdate as datetime object
-                indiv.birthdate = datetime(
-                    int(gedline.args[2]),
-                    datetime.strptime(gedline.args[1], '%b').month,
-                    int(gedline.args[0]))
-                date_type = None
-            elif date_type == "DEAT":
-                # Store death as datetime object
-                indiv.death = datetime(
-                    int(gedline.args[2]),
-                    datetime.strptime(gedline.args[1], '%b').month,
-                    int(gedline.args[0]))
-                date_type = None
-            else:
-                print "ERROR"
-    return indiv
-
-
-def parse_single_family(gedlist, index, xref):
+
+    for match in matches:
+        level, tag = match.group(1, 2)
+
+        # A level 0 line closes the open record and may start a new one
+        if level == '0':
+            if record is not None:
+                yield record
+            date_type = None
+            record = None
+            gedline = Gedline(match.group().rstrip('\r'))
+            if gedline.tag == 'INDI':
+                record = Individual(gedline.xref)
+            elif gedline.tag == 'FAM':
+                record = Family(gedline.xref)
+        elif isinstance(record, Individual):
+            if tag in INDIVIDUAL_TAGS:
+                date_type = parse_individual_line(record, tag,
+                                                  _arguments(match),
+                                                  date_type)
+        elif isinstance(record, Family):
+            if tag in FAMILY_TAGS:
+                date_type = parse_family_line(record, tag, _arguments(match),
+                                              date_type)
+
+    if record is not None:
+        yield record
+
+
+def _arguments(match):
+    """ Returns the arguments of a matched line split on spaces """
+    arguments = match.group(3)
+    if arguments is None:
+        return []
+    return arguments.split(' ')
+
+
+def parse_individual_line(indiv, tag, args, date_type):
     """
-    Parses a single family from a GEDCOM giving the starting index of a
-    'FAM' tag. Returns an Family class
+    Applies a single line belonging to an 'INDI' record, given its tag and
+    arguments, to the Individual being assembled. Returns the event type the
+    next 'DATE' line belongs to.
     """
-    family = Family(xref)
+    if tag == "NAME":
+        indiv.name = args
+        indiv.given, indiv.surname = split_name(args)
+    # GIVN/SURN pieces under NAME fill in what the NAME value leaves out
+    if tag == "GIVN" and not indiv.given:
+        indiv.given = intern(' '.join(args))
+    if tag == "SURN" and not indiv.surname:
+        indiv.surname = intern(' '.join(args))
+    if tag == "SEX":
+        indiv.sex = intern(args[0])
+    if tag == "BIRT":
+        date_type = "BIRT"
+    if tag == "DEAT":
+        date_type = "DEAT"
+    if tag == "FAMC":
+        indiv.famc.append(intern(args[0]))
+    if tag == "FAMS":
+        indiv.fams.append(intern(args[0]))
 
-    date_type = None
-    for gedline in gedlist[index + 1:]:
-        if gedline.level == 0:
-            break
-        if gedline.tag == "MARR":
-            date_type = "MARR"
-        if gedline.tag == "DIV":
-            date_type = "DIV"
-
-        if gedline.tag == "HUSB":
-            family.husband = gedline.args[0]
-        if gedline.tag == "WIFE":
-            family.wife = gedline.args[0]
-        if gedline.tag == "CHIL":
-            family.children.append(gedline.args[0])
-
-        # This assumes the following date tag corresponds to prev tag
-        if gedline.tag == "DATE":
-            if date_type == "MARR":
-                # Store marriage date as datetime
-                family.marriage = datetime(
-                    int(gedline.args[2]),
-                    datetime.strptime(gedline.args[1], '%b').month,
-                    int(gedline.args[0]))
-                date_type = None
-
-            elif date_type == "DIV":
-                # Store divorce date as datetime
-                family.divorce = datetime(
-                    int(gedline.args[2]),
-                    datetime.strptime(gedline.args[1], '%b').month,
-                    int(gedline.args[0]))
-                date_type = None
-            else:
-                print "ERROR"
-
-    return family
+    # This assumes the following date tag corresponds to prev tag
+    if tag == "DATE":
+        if date_type == "BIRT":
+            indiv.birthdate = parse_ordinal(' '.join(args))
+            date_type = None
+        elif date_type == "DEAT":
+            indiv.death = parse_ordinal(' '.join(args))
+            date_type = None
+        else:
+            print >> sys.stderr, "ERROR"
+    return date_type
+
+
+def parse_family_line(family, tag, args, date_type):
+    """
+    Applies a single line belonging to a 'FAM' record, given its tag and
+    arguments, to the Family being assembled. Returns the event type the
+    next 'DATE' line belongs to.
+    """
+    if tag == "MARR":
+        date_type = "MARR"
+    if tag == "DIV":
+        date_type = "DIV"
+
+    if tag == "HUSB":
+        family.husband = intern(args[0])
+    if tag == "WIFE":
+        family.wife = intern(args[0])
+    if tag == "CHIL":
+        family.children.append(intern(args[0]))
+
+    # This assumes the following date tag corresponds to prev tag
+    if tag == "DATE":
+        if date_type == "MARR":
+            family.marriage = parse_ordinal(' '.join(args))
+            date_type = None
+
+        elif date_type == "DIV":
+            family.divorce = parse_ordinal(' '.join(args))
+            date_type = None
+        else:
+            print >> sys.stderr, "ERROR"
+
+    return date_type
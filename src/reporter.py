@@ -0,0 +1,176 @@
+""" Python module for parsing GEDCOM geneaology files - reporters
+
+    This file provides the writers for the findings of a validation run:
+    the console table, JSON Lines and CSV. Output is buffered and written
+    in blocks, and findings can be written as each user story finishes.
+"""
+
+import csv
+import sys
+from collections import OrderedDict
+from json.encoder import encode_basestring_ascii as quote
+
+from findings import LISTING
+
+BUFFER_LINES = 4096
+
+
+class Reporter(object):
+    """ Base reporter: formats findings into lines and writes them to
+    stream in blocks of buffer_lines.
+
+    validation calls begin(), then write() with each batch of findings as
+    the user stories produce them, then end() with the finished
+    ValidationResult for its listings.
+    """
+
+    def __init__(self, stream=None, buffer_lines=BUFFER_LINES):
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_lines = buffer_lines
+        self._lines = []
+
+    def begin(self):
+        """ Writes anything that comes before the findings """
+        pass
+
+    def write(self, findings):
+        """ Writes findings """
+        for finding in findings:
+            self._lines.extend(self.format(finding))
+            if len(self._lines) >= self.buffer_lines:
+                self.flush()
+
+    def end(self, result):
+        """ Writes the listings of result and flushes the output """
+        for story, (title, individuals) in result.listings.items():
+            self._lines.extend(self.format_listing(story, title,
+                                                   individuals))
+        self.flush()
+        self.stream.flush()
+
+    def flush(self):
+        """ Writes the buffered lines to the stream """
+        if self._lines:
+            self.stream.write(''.join(self._lines))
+            del self._lines[:]
+
+    def format(self, finding):
+        """ Returns the lines for a finding """
+        raise NotImplementedError
+
+    def format_listing(self, story, title, individuals):
+        """ Returns the lines for the listing of story """
+        raise NotImplementedError
+
+
+class TextReporter(Reporter):
+    """ Fixed width table for the console """
+
+    def begin(self):
+        self._lines.append("ERRORS/ANOMALIES".center(80, ' ') + "\n")
+        self._lines.append("\nError/Anom:     Description:                 "
+                           "                         Location\n")
+        self._lines.append('-' * 80 + "\n")
+
+    def end(self, result):
+        self._lines.append("\n-------------------------------\n")
+        super(TextReporter, self).end(result)
+
+    def format(self, finding):
+        return table_rows(finding.severity, finding.story, finding.message,
+                          table_locations(finding.locations))
+
+    def format_listing(self, story, title, individuals):
+        lines = ["\n%s:\n" % title]
+        lines.extend(" ".join(x.name) + "\n" for x in individuals)
+        lines.append("-------------------------------\n")
+        return lines
+
+
+class JsonLinesReporter(Reporter):
+    """ One JSON object per finding or listing; a missing record, such as
+    the absent spouse of a family, is located as null """
+
+    def format(self, finding):
+        return [self._line(finding.story, finding.severity, finding.message,
+                           finding.locations)]
+
+    def format_listing(self, story, title, individuals):
+        return [self._line(story, LISTING, title,
+                           [x.uid for x in individuals])]
+
+    def _line(self, story, severity, message, locations):
+        """ Returns one JSON line. Built from quoted strings directly, as
+        json.dumps of an OrderedDict per finding is several times slower """
+        return '{"story": %s, "severity": %s, "message": %s, ' \
+            '"locations": [%s]}\n' % (quote(story), quote(severity),
+                                      quote(message),
+                                      ', '.join('null' if uid is None
+                                                else quote(uid)
+                                                for uid in locations))
+
+
+class CsvReporter(Reporter):
+    """ CSV with a header row; locations are separated by spaces, and a
+    missing record is left empty so the others keep their places """
+
+    def __init__(self, stream=None, buffer_lines=BUFFER_LINES):
+        super(CsvReporter, self).__init__(stream, buffer_lines)
+        self._writer = csv.writer(_LineSink(self._lines),
+                                  lineterminator="\n")
+
+    # The csv writer appends rows to the buffer itself, so format and
+    # format_listing have no lines to return
+    def begin(self):
+        self._writer.writerow(('story', 'severity', 'message', 'locations'))
+
+    def format(self, finding):
+        self._writer.writerow((finding.story, finding.severity,
+                               finding.message,
+                               ' '.join(uid or ''
+                                        for uid in finding.locations)))
+        return []
+
+    def format_listing(self, story, title, individuals):
+        self._writer.writerow((story, LISTING, title,
+                               ' '.join(x.uid for x in individuals)))
+        return []
+
+
+class _LineSink(object):
+    """ File-like target for csv.writer that appends each row to a list """
+
+    def __init__(self, lines):
+        self.write = lines.append
+
+
+REPORTERS = OrderedDict((('text', TextReporter),
+                         ('jsonl', JsonLinesReporter),
+                         ('csv', CsvReporter)))
+
+
+def table_locations(locations):
+    """ Returns the location column of the console table for locations,
+    leaving out records that are missing, such as the absent spouse of a
+    family """
+    return ','.join(uid for uid in locations if uid is not None)
+
+
+def table_rows(rtype, number, description, location):
+    """ Returns the console table rows for one finding, wrapping any column
+    that is too long onto further rows """
+    rows = []
+    while True:
+        rows.append('{:7.7s}  {:5.5s}  {:50.50s}    {:10.10s}\n'
+                    .format(rtype, number, description, location))
+
+        # Locations of 6 characters or more wrap (as they always have), which
+        # leaves a blank row under short multi-record locations
+        if len(rtype) <= 7 and len(number) <= 5 and len(description) <= 50 \
+                and len(location) <= 5:
+            return rows
+
+        rtype = rtype[7:]
+        number = number[5:]
+        description = description[50:]
+        location = location[10:]
@@ -0,0 +1,523 @@
+""" Python module for parsing GEDCOM geneaology files - columnar table
+
+    This file provides a column oriented representation of a parsed GEDCOM
+    file for the GEDCOM parsing project. Every attribute of every record is
+    held in one flat array per attribute instead of one object per record,
+    which keeps very large files in a small amount of memory.
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+from dates import DayRange
+from models import extract_id
+
+NO_ROW = -1
+NO_STRING = -1  # Pool index of a missing name
+STANDARD_NAME = -2  # Pool index of a name that is just 'given /surname/'
+SEXES = (None, 'M', 'F', 'U')
+SEX_CODES = {'M': 1, 'F': 2}
+
+# Xrefs such as '@I12@' are stored as a prefix and a number. The number
+# must fit an array('i') and have no leading zero, so that formatting it
+# again gives back the same xref.
+XREF_PATTERN = re.compile(r'@([^@0-9]*)([1-9][0-9]{0,8})@\Z')
+MAX_PREFIXES = 256
+# A numbered xref gets a slot in its prefix's array only while the number
+# is below twice the symbol count plus this, so a few huge numbers cannot
+# blow the array up; the rest go in a dict like any other xref
+NUMBER_SLACK = 4096
+
+# Date column -> (flags column, bit set there when the date is a DayRange)
+RANGE_BITS = {'birth': ('ind_flags', 1), 'death': ('ind_flags', 2),
+              'marriage': ('fam_flags', 1), 'divorce': ('fam_flags', 2)}
+
+
+def _standard_name(given, surname):
+    """ Returns the NAME value that split_name splits into given and
+    surname in the usual 'Given /Surname/' form """
+    return '%s /%s/' % (given, surname) if given else '/%s/' % surname
+
+
+class GedcomTable(object):
+    """ Columnar store of the individuals and families in a GEDCOM file.
+
+    Every xref seen in the file (record ids and pointers alike) is given a
+    symbol number. An xref of the usual '@<letters><number>@' form is kept
+    as a prefix and a number, and found again through an array per prefix
+    indexed by number; only other xrefs are kept as strings. Records are
+    rows; pointer lists (famc, fams, children) are stored CSR style as an
+    offsets array into a flat array of symbols. Names, given names and
+    surnames are indexes into a pool of distinct strings, and a name that
+    is just 'given /surname/' is not stored at all. Dates are stored as
+    their day ordinals; the few that are a DayRange are flagged and their
+    bounds kept in sorted arrays by row, one set per date column.
+
+    No Python object is held per row: the row views are made on access.
+    """
+
+    def __init__(self):
+        # Symbol table shared by record ids and pointers
+        self.prefixes = []
+        self.prefix_index = {}
+        self.uid_formats = []  # prefix -> '@<prefix>%d@'
+        self.numbered = []  # prefix -> number -> symbol + 1, 0 if unseen
+        self.sym_prefix = array('B')
+        self.sym_number = array('i')  # 0 if the uid is in other_uids
+        self.other_uids = {}  # symbol -> uid
+        self.other_symbols = {}  # uid -> symbol
+
+        # Pool of distinct name strings
+        self.strings = []
+        self.string_index = {}
+
+        # Individuals
+        self.ind_symbol = array('i')
+        self.ind_name = array('i')
+        self.ind_given = array('i')
+        self.ind_surname = array('i')
+        self.sex = array('b')
+        self.ind_flags = array('B')
+        self.birth = array('i')
+        self.death = array('i')
+        self.famc_offsets = array('i', [0])
+        self.famc = array('i')
+        self.fams_offsets = array('i', [0])
+        self.fams = array('i')
+
+        # Families
+        self.fam_symbol = array('i')
+        self.fam_flags = array('B')
+        self.marriage = array('i')
+        self.divorce = array('i')
+        self.husband = array('i')
+        self.wife = array('i')
+        self.children_offsets = array('i', [0])
+        self.children = array('i')
+
+        # Date column -> (rows, lows, highs) of its DayRanges, by row
+        self.ranges = dict((name, (array('i'), array('i'), array('i')))
+                           for name in RANGE_BITS)
+
+        # Symbol -> row, NO_ROW if the symbol is not that kind of record
+        self.symbol_ind_row = array('i')
+        self.symbol_fam_row = array('i')
+
+        # Date column -> (column, flags column, range bit, ranges)
+        self._dates = dict(
+            (name, (getattr(self, name), getattr(self, flags), bit,
+                    self.ranges[name]))
+            for name, (flags, bit) in RANGE_BITS.items())
+
+    def find_symbol(self, uid):
+        """ Returns the symbol number for uid or None if it is unseen """
+        match = XREF_PATTERN.match(uid)
+        if match:
+            text, digits = match.groups()
+            prefix = self.prefix_index.get(text)
+            if prefix is not None:
+                numbers = self.numbered[prefix]
+                number = int(digits)
+                if number < len(numbers) and numbers[number]:
+                    return numbers[number] - 1
+        return self.other_symbols.get(uid)
+
+    def symbol(self, uid):
+        """ Returns the symbol number for uid, adding it if unseen """
+        sym = self.find_symbol(uid)
+        if sym is not None:
+            return sym
+
+        sym = len(self.sym_number)
+        self.symbol_ind_row.append(NO_ROW)
+        self.symbol_fam_row.append(NO_ROW)
+
+        match = XREF_PATTERN.match(uid)
+        if match:
+            prefix = self.prefix_index.get(match.group(1))
+            if prefix is None and len(self.prefixes) < MAX_PREFIXES:
+                prefix = len(self.prefixes)
+                self.prefixes.append(match.group(1))
+                self.prefix_index[match.group(1)] = prefix
+                self.uid_formats.append(
+                    '@%s%%d@' % match.group(1).replace('%', '%%'))
+                self.numbered.append(array('i'))
+            number = int(match.group(2))
+            if prefix is not None and number < 2 * sym + NUMBER_SLACK:
+                numbers = self.numbered[prefix]
+                if number >= len(numbers):
+                    numbers.extend(array('i', [0]) *
+                                   (number + 1 - len(numbers)))
+                numbers[number] = sym + 1
+                self.sym_prefix.append(prefix)
+                self.sym_number.append(number)
+                return sym
+
+        self.sym_prefix.append(0)
+        self.sym_number.append(0)
+        self.other_uids[sym] = uid
+        self.other_symbols[uid] = sym
+        return sym
+
+    def uid(self, sym):
+        """ Returns the uid of a symbol number """
+        number = self.sym_number[sym]
+        if number:
+            return self.uid_formats[self.sym_prefix[sym]] % number
+        return self.other_uids[sym]
+
+    def int_id(self, sym):
+        """ Returns the numeric part of the uid of a symbol number """
+        return self.sym_number[sym] or extract_id(self.other_uids[sym])
+
+    def string(self, text):
+        """ Returns the pool index of text, adding it if unseen """
+        if text is None:
+            return NO_STRING
+        try:
+            return self.string_index[text]
+        except KeyError:
+            index = len(self.strings)
+            self.strings.append(text)
+            self.string_index[text] = index
+            return index
+
+    def add_individual(self, indiv):
+        """ Appends an Individual as a new row """
+        sym = self.symbol(indiv.uid)
+        row = len(self.ind_symbol)
+        self.symbol_ind_row[sym] = row
+
+        self.ind_symbol.append(sym)
+        if indiv.name is None:
+            self.ind_name.append(NO_STRING)
+        else:
+            name = ' '.join(indiv.name)
+            if name == _standard_name(indiv.given, indiv.surname):
+                self.ind_name.append(STANDARD_NAME)
+            else:
+                self.ind_name.append(self.string(name))
+        self.ind_given.append(self.string(indiv.given))
+        self.ind_surname.append(self.string(indiv.surname))
+        self.sex.append(SEX_CODES.get(indiv.sex, 0 if indiv.sex is None
+                                      else 3))
+        self.ind_flags.append(self._add_date('birth', row, indiv.birthdate) |
+                              self._add_date('death', row, indiv.death))
+        self.famc.extend(self.symbol(uid) for uid in indiv.famc)
+        self.famc_offsets.append(len(self.famc))
+        self.fams.extend(self.symbol(uid) for uid in indiv.fams)
+        self.fams_offsets.append(len(self.fams))
+
+    def add_family(self, family):
+        """ Appends a Family as a new row """
+        sym = self.symbol(family.uid)
+        row = len(self.fam_symbol)
+        self.symbol_fam_row[sym] = row
+
+        self.fam_symbol.append(sym)
+        self.fam_flags.append(
+            self._add_date('marriage', row, family.marriage) |
+            self._add_date('divorce', row, family.divorce))
+        self.husband.append(self.symbol(family.husband)
+                            if family.husband is not None else NO_ROW)
+        self.wife.append(self.symbol(family.wife)
+                         if family.wife is not None else NO_ROW)
+        self.children.extend(self.symbol(uid) for uid in family.children)
+        self.children_offsets.append(len(self.children))
+
+    def _add_date(self, name, row, day):
+        """ Appends day to the date column name. Returns the bit to set in
+        the row's flags, which is 0 unless day is a DayRange. """
+        getattr(self, name).append(day)
+        if type(day) is not DayRange:
+            return 0
+        rows, lows, highs = self.ranges[name]
+        rows.append(row)
+        lows.append(day.low)
+        highs.append(day.high)
+        return RANGE_BITS[name][1]
+
+    def date(self, name, row):
+        """ Returns the date of column name at row """
+        column, flags, bit, (rows, lows, highs) = self._dates[name]
+        day = column[row]
+        if not flags[row] & bit:
+            return day
+        index = bisect_left(rows, row)
+        return DayRange(day, lows[index], highs[index])
+
+    def name(self, row):
+        """ Returns the NAME value of individual row as a list of words """
+        index = self.ind_name[row]
+        if index == NO_STRING:
+            return None
+        if index == STANDARD_NAME:
+            return _standard_name(self.strings[self.ind_given[row]],
+                                  self.strings[self.ind_surname[row]])\
+                .split(' ')
+        return self.strings[index].split(' ')
+
+    def individual_row(self, uid):
+        """ Returns the row of individual uid or NO_ROW """
+        sym = self.find_symbol(uid)
+        return NO_ROW if sym is None else self.symbol_ind_row[sym]
+
+    def family_row(self, uid):
+        """ Returns the row of family uid or NO_ROW """
+        sym = self.find_symbol(uid)
+        return NO_ROW if sym is None else self.symbol_fam_row[sym]
+
+    def individual_count(self):
+        """ Returns the number of individual rows """
+        return len(self.ind_symbol)
+
+    def family_count(self):
+        """ Returns the number of family rows """
+        return len(self.fam_symbol)
+
+    def column(self, name):
+        """ Returns an array column as a NumPy array sharing its memory.
+        Requires NumPy. """
+        import numpy
+        column = getattr(self, name)
+        return numpy.frombuffer(column, dtype=column.typecode)
+
+    def nbytes(self):
+        """ Returns the bytes held by the table: its arrays, the string pool
+        and the dicts of xrefs that are not numbered """
+        total = sum(sys.getsizeof(value) for value in vars(self).values())
+        total += sum(sys.getsizeof(numbers) for numbers in self.numbered)
+        total += sum(sys.getsizeof(column) for columns in self.ranges.values()
+                     for column in columns)
+        total += sum(sys.getsizeof(text) for text in self.strings)
+        total += sum(sys.getsizeof(uid) for uid in self.other_uids.values())
+        return total
+
+    def individuals(self):
+        """ Returns a read-only sequence of Individual-like row views """
+        return RowSequence(self, IndividualRow, self.individual_count())
+
+    def families(self):
+        """ Returns a read-only sequence of Family-like row views """
+        return RowSequence(self, FamilyRow, self.family_count())
+
+    def records(self):
+        """ Adapter for the user stories: returns (individuals, families)
+        sequences of row views that behave like Individual and Family """
+        return self.individuals(), self.families()
+
+    def indexes(self):
+        """ Returns the uid indexes of GedcomDatabase over the table: uid ->
+        individual, uid -> family, uid -> families uid is a spouse in and
+        uid -> families uid is a child in """
+        spouses = self._group(lambda: (
+            (sym, row) for row in xrange(self.family_count())
+            for sym in (self.husband[row], self.wife[row]) if sym != NO_ROW))
+        children = self._group(lambda: (
+            (sym, row) for row in xrange(self.family_count())
+            for sym in self.children[self.children_offsets[row]:
+                                     self.children_offsets[row + 1]]))
+        return (RowIndex(self, IndividualRow, self.symbol_ind_row),
+                RowIndex(self, FamilyRow, self.symbol_fam_row),
+                FamilyGroups(self, *spouses), FamilyGroups(self, *children))
+
+    def _group(self, pairs):
+        """ Returns CSR (offsets, rows) of the rows in the (symbol, row)
+        pairs yielded by pairs(), grouped by symbol in the order yielded """
+        offsets = array('i', [0]) * (len(self.sym_number) + 1)
+        for sym, _ in pairs():
+            offsets[sym + 1] += 1
+        for sym in xrange(len(self.sym_number)):
+            offsets[sym + 1] += offsets[sym]
+        rows = array('i', [0]) * offsets[-1]
+        ends = array('i', offsets)
+        for sym, row in pairs():
+            rows[ends[sym]] = row
+            ends[sym] += 1
+        return offsets, rows
+
+    def _uids(self, symbols, offsets, row):
+        """ Resolves the CSR slice of row to a list of uids """
+        return [self.uid(sym)
+                for sym in symbols[offsets[row]:offsets[row + 1]]]
+
+
+class RowSequence(object):
+    """ Sequence of row views over a GedcomTable """
+
+    __slots__ = ('_table', '_view', '_count')
+
+    def __init__(self, table, view, count):
+        self._table = table
+        self._view = view
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError(row)
+        return self._view(self._table, row)
+
+    def __iter__(self):
+        for row in xrange(self._count):
+            yield self._view(self._table, row)
+
+
+class RowIndex(object):
+    """ Read-only uid -> row view mapping over a GedcomTable, for the
+    uid dicts of GedcomDatabase """
+
+    __slots__ = ('_table', '_view', '_symbol_rows')
+
+    def __init__(self, table, view, symbol_rows):
+        self._table = table
+        self._view = view
+        self._symbol_rows = symbol_rows
+
+    def get(self, uid, default=None):
+        sym = self._table.find_symbol(uid)
+        if sym is None or self._symbol_rows[sym] == NO_ROW:
+            return default
+        return self._view(self._table, self._symbol_rows[sym])
+
+    def __getitem__(self, uid):
+        view = self.get(uid)
+        if view is None:
+            raise KeyError(uid)
+        return view
+
+    def __contains__(self, uid):
+        return self.get(uid) is not None
+
+
+class FamilyGroups(object):
+    """ Read-only uid -> list of family row views mapping over a
+    GedcomTable, grouped CSR style by symbol """
+
+    __slots__ = ('_table', '_offsets', '_rows')
+
+    def __init__(self, table, offsets, rows):
+        self._table = table
+        self._offsets = offsets
+        self._rows = rows
+
+    def get(self, uid, default=None):
+        sym = self._table.find_symbol(uid)
+        if sym is None or self._offsets[sym] == self._offsets[sym + 1]:
+            return default
+        return [FamilyRow(self._table, row) for row in
+                self._rows[self._offsets[sym]:self._offsets[sym + 1]]]
+
+
+class RowView(object):
+    """ View of one row of a GedcomTable. Views are made on access, so two
+    views are equal when they show the same row. """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other._table is self._table \
+            and other._row == self._row
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self._row))
+
+
+class IndividualRow(RowView):
+    """ View of one individual row with the attributes of Individual """
+
+    __slots__ = ()
+
+    @property
+    def uid(self):
+        return self._table.uid(self._table.ind_symbol[self._row])
+
+    @property
+    def int_id(self):
+        return self._table.int_id(self._table.ind_symbol[self._row])
+
+    @property
+    def name(self):
+        return self._table.name(self._row)
+
+    @property
+    def given(self):
+        index = self._table.ind_given[self._row]
+        return self._table.strings[index] if index != NO_STRING else None
+
+    @property
+    def surname(self):
+        index = self._table.ind_surname[self._row]
+        return self._table.strings[index] if index != NO_STRING else None
+
+    @property
+    def sex(self):
+        return SEXES[self._table.sex[self._row]]
+
+    @property
+    def birthdate(self):
+        return self._table.date('birth', self._row)
+
+    @property
+    def death(self):
+        return self._table.date('death', self._row)
+
+    @property
+    def famc(self):
+        table = self._table
+        return table._uids(table.famc, table.famc_offsets, self._row)
+
+    @property
+    def fams(self):
+        table = self._table
+        return table._uids(table.fams, table.fams_offsets, self._row)
+
+
+class FamilyRow(RowView):
+    """ View of one family row with the attributes of Family """
+
+    __slots__ = ()
+
+    @property
+    def uid(self):
+        return self._table.uid(self._table.fam_symbol[self._row])
+
+    @property
+    def int_id(self):
+        return self._table.int_id(self._table.fam_symbol[self._row])
+
+    @property
+    def marriage(self):
+        return self._table.date('marriage', self._row)
+
+    @property
+    def divorce(self):
+        return self._table.date('divorce', self._row)
+
+    @property
+    def husband(self):
+        sym = self._table.husband[self._row]
+        return self._table.uid(sym) if sym != NO_ROW else None
+
+    @property
+    def wife(self):
+        sym = self._table.wife[self._row]
+        return self._table.uid(sym) if sym != NO_ROW else None
+
+    @property
+    def children(self):
+        table = self._table
+        return table._uids(table.children, table.children_offsets, self._row)
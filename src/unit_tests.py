@@ -5,7 +5,30 @@
 
 import unittest
 import os
-from parser import parse_ged
+import glob
+import csv
+import json
+import tempfile
+import shutil
+import pickle
+from StringIO import StringIO
+from datetime import datetime
+from dates import parse_date, parse_ordinal, DayRange, earliest, latest, \
+    FIRST_DAY, LAST_DAY
+from parser import parse_ged, iter_records, parse_table, parse_parallel, \
+    split_ranges, iter_mapped_records
+from database import GedcomDatabase
+from models import Individual
+from graph import FamilyGraph
+from names import split_name, normalise_name
+from findings import ValidationResult, Finding, ERROR, LISTING
+from reporter import TextReporter, JsonLinesReporter, CsvReporter
+from parallel import run_parallel
+from cache import ParseCache, parse_cached, TEMP_SUFFIX
+from incremental import IncrementalValidation
+from watch import Watch, changes
+from batch import find_files, run_batch, write_report, OK, FAILED, CRASHED, \
+    TIMED_OUT
 
 # Add user stories after creation of test
 from user_stories import dates_before_current, birth_before_marriage, \
@@ -13,15 +36,25 @@ from user_stories import dates_before_current, birth_before_marriage, \
     divorce_before_death, birth_before_death_of_parents, marriage_age, \
     parents_not_too_old, no_bigamy, age_less_150, \
     birth_before_marriage_of_parents, multiple_births_less_5, \
-    no_sibling_marriage, no_marriage_to_decendants, \
+    no_sibling_marriage, no_marriage_to_decendants, no_ancestry_cycles, \
     fewer_than_fifteen_siblings, male_last_names, \
     sibling_spacing, correct_gender_for_role, unique_ids, list_deceased, \
-    list_living_married
+    list_living_married, unique_names_and_birth_dates, \
+    unique_families_by_spouses, validation, select_rules, run_rules, \
+    run_fused, Rule, RULES
 
 FAIL_DIR = "acceptance_files/fail/"
 PASS_DIR = "acceptance_files/pass/"
 
 
+def ged_database(lines):
+    """ Returns the GedcomDatabase of a GEDCOM file given as its lines """
+    records = list(iter_records(StringIO('\n'.join(lines) + '\n')))
+    return GedcomDatabase(
+        [record for record in records if isinstance(record, Individual)],
+        [record for record in records if not isinstance(record, Individual)])
+
+
 class TestParser(unittest.TestCase):
     """ Unit tests to verift unit stories"""
 
@@ -33,10 +66,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(dates_before_current(individuals, families))
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(dates_before_current(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(dates_before_current(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(dates_before_current(db))
         else:
             print "!!test_date_before_current acceptance file not found"
 
@@ -48,10 +81,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(birth_before_marriage(individuals, families))
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(birth_before_marriage(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(birth_before_marriage(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(birth_before_marriage(db))
         else:
             print "!!test_marriage_before_death acceptance file not found"
 
@@ -63,10 +96,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(marriage_before_death(individuals, families))
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(marriage_before_death(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(marriage_before_death(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(marriage_before_death(db))
         else:
             print "!!test_marriage_before_death acceptance file not found"
 
@@ -78,10 +111,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(divorce_before_death(individuals, families))
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(divorce_before_death(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(divorce_before_death(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(divorce_before_death(db))
         else:
             print "!!test_divorce_before_death acceptance file not found"
 
@@ -93,10 +126,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            individuals, _ = parse_ged(pass_file)
-            self.assertTrue(birth_before_death(individuals))
-            individuals, _ = parse_ged(fail_file)
-            self.assertFalse(birth_before_death(individuals))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(birth_before_death(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(birth_before_death(db))
         else:
             print "!!test_birth_before_death acceptance file not found"
 
@@ -107,10 +140,10 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + "marriage_before_divorce.ged"
 
         if os.path.exists(fail_file) and os.path.exists(pass_file):
-            _, families = parse_ged(pass_file)
-            self.assertTrue(marriage_before_divorce(families))
-            _, families = parse_ged(fail_file)
-            self.assertFalse(marriage_before_divorce(families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(marriage_before_divorce(db))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(marriage_before_divorce(db))
         else:
             print "!!marriage_before_divorce acceptance file not found"
 
@@ -122,14 +155,14 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, _ = parse_ged(pass_file)
-            self.assertTrue(age_less_150(individuals))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(age_less_150(db))
         else:
             print "!!age_less_150 acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, _ = parse_ged(fail_file)
-            self.assertFalse(age_less_150(individuals))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(age_less_150(db))
         else:
             print "!!age_less_150 acceptance file not found"
 
@@ -141,17 +174,17 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
+            db = GedcomDatabase(*parse_ged(pass_file))
             self.assertTrue(
-                birth_before_marriage_of_parents(individuals, families))
+                birth_before_marriage_of_parents(db))
         else:
             print "!!birth_before_marriage_of_parents " \
                 + "acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
+            db = GedcomDatabase(*parse_ged(fail_file))
             self.assertFalse(
-                birth_before_marriage_of_parents(individuals, families))
+                birth_before_marriage_of_parents(db))
         else:
             print "!!birth_before_marriage_of_parents " \
                 + "acceptance file not found"
@@ -166,23 +199,23 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + "birth_before_death_of_parents.ged"
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
+            db = GedcomDatabase(*parse_ged(pass_file))
             self.assertTrue(
-                birth_before_death_of_parents(individuals, families))
+                birth_before_death_of_parents(db))
         else:
             print "!!birth_before_death_of_parents acceptance file not found"
 
         if os.path.exists(fail_file_father):
-            individuals, families = parse_ged(fail_file_father)
+            db = GedcomDatabase(*parse_ged(fail_file_father))
             self.assertFalse(
-                birth_before_death_of_parents(individuals, families))
+                birth_before_death_of_parents(db))
         else:
             print "!!birth_before_death_of_parents acceptance file not found"
 
         if os.path.exists(fail_file_mother):
-            individuals, families = parse_ged(fail_file_mother)
+            db = GedcomDatabase(*parse_ged(fail_file_mother))
             self.assertFalse(
-                birth_before_death_of_parents(individuals, families))
+                birth_before_death_of_parents(db))
         else:
             print "!!birth_before_death_of_parents acceptance file not found"
 
@@ -194,14 +227,14 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(parents_not_too_old(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(parents_not_too_old(db))
         else:
             print "!!parents_not_too_old acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(parents_not_too_old(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(parents_not_too_old(db))
         else:
             print "!!parents_not_too_old acceptance file not found"
 
@@ -213,14 +246,14 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(marriage_age(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(marriage_age(db))
         else:
             print "!!marriage_age acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(marriage_age(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(marriage_age(db))
         else:
             print "!!marriage_age acceptance file not found"
 
@@ -232,17 +265,48 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(no_bigamy(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(no_bigamy(db))
         else:
             print "!!no_bigamy acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(no_bigamy(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(no_bigamy(db))
         else:
             print "!!no_bigamy acceptance file not found"
 
+        # @I1@ marries four times: @F2@ starts before @F1@ is dissolved, and
+        # @F2@ is never dissolved, so @F3@ and @F4@, which has no wife,
+        # overlap it. @I5@ marries three times in turn. @I9@ marries @I10@
+        # while still married in @F8@, which has no husband.
+        lines = []
+        for family, husband, wife, marriage, divorce in (
+                ("@F1@", "@I1@", "@I2@", "1950", "1960"),
+                ("@F2@", "@I1@", "@I3@", "1955", None),
+                ("@F3@", "@I1@", "@I4@", "1970", None),
+                ("@F4@", "@I1@", None, "1990", None),
+                ("@F5@", "@I5@", "@I6@", "1950", "1960"),
+                ("@F6@", "@I5@", "@I7@", "1961", "1970"),
+                ("@F7@", "@I5@", "@I8@", "1971", None),
+                ("@F8@", None, "@I9@", "1950", None),
+                ("@F9@", "@I10@", "@I9@", "1955", None)):
+            lines += ["0 %s FAM" % family, "1 MARR", "2 DATE " + marriage]
+            if husband:
+                lines.append("1 HUSB " + husband)
+            if wife:
+                lines.append("1 WIFE " + wife)
+            if divorce:
+                lines += ["1 DIV", "2 DATE " + divorce]
+        lines += ["0 @I4@ INDI", "1 DEAT", "2 DATE 1980"]
+        result = ValidationResult()
+        self.assertFalse(no_bigamy(ged_database(lines), result))
+        self.assertEqual([finding.locations for finding in result.findings],
+                         [["@I2@", "@I3@", "@I1@"],
+                          ["@I3@", "@I4@", "@I1@"],
+                          ["@I3@", None, "@I1@"],
+                          [None, "@I10@", "@I9@"]])
+
     def test_multiple_births_less_5(self):
         """ Unit test for multiple_births_less_5"""
 
@@ -251,14 +315,13 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(multiple_births_less_5(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(multiple_births_less_5(db))
         else:
             print "!!multiple_births_less_5 acceptance file not found"
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(multiple_births_less_5(
-                individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(multiple_births_less_5(db))
         else:
             print "!!multiple_births_less_5 acceptance file not found"
 
@@ -270,16 +333,31 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(sibling_spacing(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(sibling_spacing(db))
         else:
             print "!!sibling_spacing acceptance file not found"
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(sibling_spacing(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(sibling_spacing(db))
         else:
             print "!!sibling_spacing acceptance file not found"
 
+        # Every family is checked, not only the first: the children of
+        # @F2@ are born two months apart
+        lines = ["0 @F1@ FAM", "1 CHIL @I10@", "1 CHIL @I11@",
+                 "0 @F2@ FAM", "1 CHIL @I20@", "1 CHIL @I21@"]
+        for uid, family, birth in (("@I10@", "@F1@", "1 JAN 1990"),
+                                   ("@I11@", "@F1@", "1 JAN 1992"),
+                                   ("@I20@", "@F2@", "1 JAN 1990"),
+                                   ("@I21@", "@F2@", "1 MAR 1990")):
+            lines += ["0 %s INDI" % uid, "1 BIRT", "2 DATE " + birth,
+                      "1 FAMC " + family]
+        result = ValidationResult()
+        self.assertFalse(sibling_spacing(ged_database(lines), result))
+        self.assertEqual([finding.locations for finding in result.findings],
+                         [["@I21@", "@I20@"]])
+
     def test_fewer_than_fifteen_siblings(self):
         """ Unit test for fewer_than_fifteen_siblings"""
 
@@ -288,14 +366,13 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(fewer_than_fifteen_siblings(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(fewer_than_fifteen_siblings(db))
         else:
             print "!!fewer_than_fifteen_siblings acceptance file not found"
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(fewer_than_fifteen_siblings(
-                individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(fewer_than_fifteen_siblings(db))
         else:
             print "!!fewer_than_fifteen_siblings acceptance file not found"
 
@@ -307,14 +384,14 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(correct_gender_for_role(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(correct_gender_for_role(db))
         else:
             print "!!correct_gender_for_role acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(correct_gender_for_role(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(correct_gender_for_role(db))
         else:
             print "!!correct_gender_for_role acceptance file not found"
 
@@ -326,17 +403,55 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(unique_ids(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(unique_ids(db))
         else:
             print "!!unique_ids acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(unique_ids(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(unique_ids(db))
         else:
             print "!!unique_ids acceptance file not found"
 
+    def test_unique_names_and_birth_dates(self):
+        """ Unit test for unique_names_and_birth_dates """
+
+        acceptf = "unique_names_and_birth_dates.ged"
+        fail_file = FAIL_DIR + acceptf
+        pass_file = PASS_DIR + acceptf
+
+        if os.path.exists(pass_file):
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(unique_names_and_birth_dates(db))
+        else:
+            print "!!unique_names_and_birth_dates acceptance file not found"
+
+        if os.path.exists(fail_file):
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(unique_names_and_birth_dates(db))
+        else:
+            print "!!unique_names_and_birth_dates acceptance file not found"
+
+    def test_unique_families_by_spouses(self):
+        """ Unit test for unique_families_by_spouses """
+
+        acceptf = "unique_families_by_spouses.ged"
+        fail_file = FAIL_DIR + acceptf
+        pass_file = PASS_DIR + acceptf
+
+        if os.path.exists(pass_file):
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(unique_families_by_spouses(db))
+        else:
+            print "!!unique_families_by_spouses acceptance file not found"
+
+        if os.path.exists(fail_file):
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(unique_families_by_spouses(db))
+        else:
+            print "!!unique_families_by_spouses acceptance file not found"
+
     def test_male_last_names(self):
         """ Unit test for male_last_names """
 
@@ -345,14 +460,14 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(male_last_names(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(male_last_names(db))
         else:
             print "!!male_last_names acceptance file not found"
 
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(male_last_names(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(male_last_names(db))
         else:
             print "!!male_last_names acceptance file not found"
 
@@ -364,13 +479,13 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(no_sibling_marriage(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(no_sibling_marriage(db))
         else:
             print "!!no_sibling_marriage acceptance file not found"
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(no_sibling_marriage(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(no_sibling_marriage(db))
         else:
             print "!!no_sibling_marriage acceptance file not found"
 
@@ -382,16 +497,36 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            self.assertTrue(no_marriage_to_decendants(individuals, families))
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(no_marriage_to_decendants(db))
         else:
             print "!!no_marriage_to_decendants acceptance file not found"
         if os.path.exists(fail_file):
-            individuals, families = parse_ged(fail_file)
-            self.assertFalse(no_marriage_to_decendants(individuals, families))
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(no_marriage_to_decendants(db))
         else:
             print "!!no_marriage_to_decendants file not found"
 
+    def test_no_ancestry_cycles(self):
+        """ Unit test for no_ancestry_cycles """
+
+        acceptf = "no_ancestry_cycles.ged"
+        fail_file = FAIL_DIR + acceptf
+        pass_file = PASS_DIR + acceptf
+
+        if os.path.exists(pass_file):
+            db = GedcomDatabase(*parse_ged(pass_file))
+            self.assertTrue(no_ancestry_cycles(db))
+        else:
+            print "!!no_ancestry_cycles acceptance file not found"
+        if os.path.exists(fail_file):
+            db = GedcomDatabase(*parse_ged(fail_file))
+            self.assertFalse(no_ancestry_cycles(db))
+            # Graph walking rules must still terminate on a cycle
+            no_marriage_to_decendants(db)
+        else:
+            print "!!no_ancestry_cycles acceptance file not found"
+
     def test_list_deceased(self):
         """ Unit test for no_marriage_to_decendants """
 
@@ -399,9 +534,9 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            people = [x.uid for x in individuals]
-            function = [x.uid for x in list_deceased(individuals, families)]
+            db = GedcomDatabase(*parse_ged(pass_file))
+            people = [x.uid for x in db.individuals]
+            function = [x.uid for x in list_deceased(db)]
             self.assertEqual(people.sort(), function.sort())
         else:
             print "!!list_deceased acceptance file not found"
@@ -413,9 +548,682 @@ class TestParser(unittest.TestCase):
         pass_file = PASS_DIR + acceptf
 
         if os.path.exists(pass_file):
-            individuals, families = parse_ged(pass_file)
-            people = [x.uid for x in individuals]
-            function = [x.uid for x in list_living_married(individuals, families)]
+            db = GedcomDatabase(*parse_ged(pass_file))
+            people = [x.uid for x in db.individuals]
+            function = [x.uid for x in list_living_married(db)]
             self.assertEqual(people.sort(), function.sort())
         else:
             print "!!list_deceased acceptance file not found"
+
+    def test_iter_records(self):
+        """ Unit test for iter_records """
+
+        path = "default_ged.ged"
+
+        if os.path.exists(path):
+            individuals, families = parse_ged(path)
+            with open(path) as ged_file:
+                records = list(iter_records(ged_file))
+            self.assertEqual([x.uid for x in records],
+                             [x.uid for x in individuals + families])
+        else:
+            print "!!default_ged.ged not found"
+
+    def test_iter_mapped_records(self):
+        """ Unit test for the memory mapped tokenizer """
+
+        lines = ['0 HEAD', '1 SOUR Export', '0 @I1@ INDI',
+                 '1 NAME Jane /Doe/', '1 _MARNM Jane /Roe/', '1 SEX F',
+                 '1 BIRT', '2 DATE 9 MAR 1990', '2 SOUR @S1@',
+                 '3 PAGE p. 12', '1 FAMS @F1@', '0 @F1@ FAM',
+                 '1 WIFE @I1@', '1 MARR', '2 DATE 2 JAN 2015',
+                 '0 @S1@ SOUR', '1 TITL Register', '0 TRLR']
+        handle, path = tempfile.mkstemp(suffix='.ged')
+        try:
+            # CRLF line ends and no final line end
+            os.write(handle, '\r\n'.join(lines))
+            os.close(handle)
+
+            individual, family = iter_mapped_records(path)
+            self.assertEqual(individual.name, ['Jane', '/Doe/'])
+            self.assertEqual(individual.surname, 'Doe')
+            self.assertEqual(individual.sex, 'F')
+            self.assertEqual(individual.fams, ['@F1@'])
+            self.assertEqual(family.wife, '@I1@')
+            self.assertTrue(family.marriage > individual.birthdate)
+
+            start = split_ranges(path, 2)[1][0]
+            self.assertEqual([x.uid for x in
+                              iter_mapped_records(path, start)], ['@F1@'])
+        finally:
+            os.remove(path)
+
+    def test_parse_cache(self):
+        """ Unit test for the parsed file cache """
+
+        fields = ['uid', 'int_id', 'name', 'given', 'surname', 'sex',
+                  'birthdate', 'death', 'famc', 'fams', 'marriage',
+                  'husband', 'wife', 'children', 'divorce']
+        paths = sorted(glob.glob(FAIL_DIR + "*.ged"))[:2]
+        if len(paths) < 2:
+            print "!!acceptance files not found"
+            return
+
+        directory = tempfile.mkdtemp()
+        try:
+            cache = ParseCache(directory)
+            key = cache.key(paths[0])
+            self.assertIsNone(cache.load(key))
+            individuals, families = parse_cached(paths[0], cache)
+            cached = cache.load(key)
+            self.assertIsNotNone(cached)
+            for record, other in zip(individuals + families,
+                                     cached[0] + cached[1]):
+                for field in fields:
+                    if hasattr(record, field):
+                        self.assertEqual(getattr(record, field),
+                                         getattr(other, field))
+
+            # A corrupt snapshot is a miss
+            with open(cache.path(key), 'wb') as snapshot:
+                snapshot.write('not a snapshot')
+            self.assertIsNone(cache.load(key))
+
+            # Only the most recently used snapshot fits
+            cache.max_bytes = 1
+            parse_cached(paths[0], cache)
+            parse_cached(paths[1], cache)
+            self.assertEqual(os.listdir(directory), [])
+            cache.max_bytes = os.path.getsize(paths[1]) * 100
+            parse_cached(paths[0], cache)
+            parse_cached(paths[1], cache)
+            os.utime(cache.path(key), (0, 0))
+            newest = cache.path(cache.key(paths[1]))
+            cache.max_bytes = os.path.getsize(newest)
+            cache.evict()
+            self.assertEqual(os.listdir(directory),
+                             [os.path.basename(newest)])
+
+            # A partial snapshot left by a killed run counts towards the
+            # size until it is abandoned, then is removed
+            partial = os.path.join(directory, "killed" + TEMP_SUFFIX)
+            with open(partial, 'wb') as snapshot:
+                snapshot.write('x')
+            cache.evict()
+            self.assertEqual(os.listdir(directory), ["killed" + TEMP_SUFFIX])
+            os.utime(partial, (0, 0))
+            cache.evict()
+            self.assertEqual(os.listdir(directory), [])
+            self.assertEqual(cache.load(cache.key(paths[1])), None)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_incremental_validation(self):
+        """ Unit test for re-validating an edited file """
+
+        path = FAIL_DIR + "parents_not_too_old.ged"
+        if not os.path.exists(path):
+            print "!!parents_not_too_old.ged acceptance file not found"
+            return
+
+        with open(path) as ged_file:
+            blocks = ged_file.read().split('\n0 ')
+        handle, copy = tempfile.mkstemp(suffix='.ged')
+        os.close(handle)
+        try:
+            def rewrite(edited):
+                with open(copy, 'w') as ged_file:
+                    ged_file.write('\n0 '.join(edited))
+
+            def check():
+                result = incremental.update()
+                expected = run_rules(GedcomDatabase(*parse_ged(copy)), RULES)
+                self.assertEqual(result.findings, expected.findings)
+                self.assertEqual(result.passed.items(),
+                                 [(rule.story, expected.passed[rule.story])
+                                  for rule in RULES
+                                  if rule.severity != LISTING])
+                return result
+
+            rewrite(blocks)
+            incremental = IncrementalValidation(copy)
+            first = check()
+            self.assertEqual(incremental.parsed, len(blocks))
+            self.assertTrue(incremental.update() is first)
+            self.assertEqual(incremental.parsed, 0)
+
+            # Make the mother a century older than her child
+            mother = [index for index, block in enumerate(blocks)
+                      if block.startswith('@I2@')][0]
+            blocks[mother] = blocks[mother].replace('5 OCT 1940',
+                                                    '5 OCT 1840')
+            rewrite(blocks)
+            self.assertNotEqual(check().findings, first.findings)
+            self.assertEqual(incremental.parsed, 1)
+            self.assertTrue(incremental.checked < len(blocks))
+
+            # Remove a child, then put it back
+            removed = blocks.pop(mother + 1)
+            rewrite(blocks)
+            check()
+            blocks.insert(mother + 1, removed)
+            rewrite(blocks)
+            check()
+        finally:
+            os.remove(copy)
+
+    def test_watch(self):
+        """ Unit test for watch mode over a directory """
+
+        path = FAIL_DIR + "parents_not_too_old.ged"
+        if not os.path.exists(path):
+            print "!!parents_not_too_old.ged acceptance file not found"
+            return
+
+        first = Finding("US01", ERROR, "Date", ["@I1@"])
+        second = Finding("US02", ERROR, "Date", ["@I2@"])
+        self.assertEqual(changes([first, second, first], [second, second]),
+                         ([second], [first, first]))
+
+        directory = tempfile.mkdtemp()
+        try:
+            copy = os.path.join(directory, "family.ged")
+            shutil.copy(path, copy)
+            output = StringIO()
+            session = Watch(directory, stream=output)
+            self.assertEqual(session.poll(), 1)
+            found = len(session.findings[copy])
+            self.assertTrue(found > 0)
+            self.assertIn("%d new, 0 resolved" % found, output.getvalue())
+            self.assertEqual(session.poll(), 0)
+
+            # Make the mother die at 175
+            with open(copy) as ged_file:
+                text = ged_file.read()
+            with open(copy, 'w') as ged_file:
+                ged_file.write(text.replace('5 OCT 1940', '5 OCT 1840'))
+            os.utime(copy, (1, 1))
+            output.truncate(0)
+            self.assertEqual(session.poll(), 1)
+            self.assertIn("1 new, 0 resolved", output.getvalue())
+            self.assertIn("Individual dies over 150 years of age",
+                          output.getvalue())
+
+            os.remove(copy)
+            output.truncate(0)
+            self.assertEqual(session.poll(), 0)
+            self.assertIn("0 new, %d resolved" % (found + 1),
+                          output.getvalue())
+            self.assertEqual(session.findings, {})
+
+            # Files in subdirectories are watched, and one that cannot be
+            # validated is reported once, not on every poll
+            os.mkdir(os.path.join(directory, "nested"))
+            broken = os.path.join(directory, "nested", "BROKEN.GED")
+            with open(broken, 'w') as ged_file:
+                ged_file.write("0 @I1@ INDI\n1 SEX\n")
+            output.truncate(0)
+            self.assertEqual(session.poll(), 0)
+            self.assertEqual(session.poll(), 0)
+            self.assertEqual(output.getvalue().count("could not be"), 1)
+
+            shutil.copy(path, broken)
+            os.utime(broken, (1, 1))
+            self.assertEqual(session.poll(), 1)
+            self.assertEqual(len(session.findings[broken]), found)
+
+            # A validated file that then fails and is deleted
+            with open(broken, 'w') as ged_file:
+                ged_file.write("0 @I1@ INDI\n1 SEX\n")
+            os.utime(broken, (2, 2))
+            self.assertEqual(session.poll(), 0)
+            os.remove(broken)
+            output.truncate(0)
+            self.assertEqual(session.poll(), 0)
+            self.assertIn("0 new, %d resolved" % found, output.getvalue())
+            self.assertEqual(session.findings, {})
+        finally:
+            shutil.rmtree(directory)
+
+    def test_batch(self):
+        """ Unit test for batch validation of a directory """
+
+        path = FAIL_DIR + "parents_not_too_old.ged"
+        if not os.path.exists(path):
+            print "!!parents_not_too_old.ged acceptance file not found"
+            return
+
+        def failing(db, result=None):
+            """ A user story that raises on one file """
+            if db.individual("@I9@") is not None:
+                raise ValueError("bad record")
+            return True
+
+        def crashing(db, result=None):
+            """ A user story that kills its process on one file """
+            if db.individual("@I9@") is not None:
+                os._exit(3)
+            return True
+
+        def hanging(db, result=None):
+            """ A user story that never finishes on one file """
+            while db.individual("@I9@") is not None:
+                pass
+            return True
+
+        directory = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(directory, "nested"))
+            first = os.path.join(directory, "a.ged")
+            extra = os.path.join(directory, "b.ged")
+            second = os.path.join(directory, "nested", "c.ged")
+            for name in (first, second):
+                shutil.copy(path, name)
+            with open(extra, 'w') as ged_file:
+                ged_file.write("0 @I9@ INDI\n1 NAME Extra /Person/\n")
+            open(os.path.join(directory, "notes.txt"), 'w').close()
+            self.assertEqual(find_files(directory), [first, extra, second])
+
+            findings = run_rules(GedcomDatabase(*parse_ged(path)),
+                                 RULES).findings
+            outcomes = list(run_batch(find_files(directory), RULES, 2))
+            self.assertEqual([outcome.filename for outcome in outcomes],
+                             [first, extra, second])
+            self.assertEqual([outcome.status for outcome in outcomes],
+                             [OK, OK, OK])
+            self.assertEqual(outcomes[0].findings, findings)
+            self.assertEqual(outcomes[2].findings, findings)
+
+            for check, status, timeout in ((failing, FAILED, 60),
+                                           (crashing, CRASHED, 60),
+                                           (hanging, TIMED_OUT, 1)):
+                rules = [rule for rule in RULES if rule.story == "US12"]
+                rules.append(Rule("XX01", ERROR, check, None, (), "Test"))
+                outcomes = list(run_batch(find_files(directory), rules, 2,
+                                          timeout))
+                self.assertEqual([outcome.status for outcome in outcomes],
+                                 [OK, status, OK])
+                self.assertTrue(outcomes[0].findings)
+                self.assertEqual(outcomes[2].findings, outcomes[0].findings)
+
+                output = StringIO()
+                statuses = write_report(iter(outcomes), rules, output)
+                self.assertEqual(statuses, {OK: 2, status: 1})
+                self.assertIn("%s: %s" % (extra, status.upper()),
+                              output.getvalue())
+                self.assertIn("3 files: 2 validated", output.getvalue())
+                self.assertIn("US12          2          %d"
+                              % (2 * len(outcomes[0].findings)),
+                              output.getvalue())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_parse_parallel(self):
+        """ Unit test for parse_parallel and split_ranges """
+
+        path = "default_ged.ged"
+        fields = ['uid', 'name', 'given', 'surname', 'sex', 'birthdate',
+                  'death', 'famc', 'fams']
+
+        if os.path.exists(path):
+            individuals, families = parse_ged(path)
+            with open(path, 'rb') as ged_file:
+                text = ged_file.read()
+            for jobs in (1, 2, 5):
+                ranges = split_ranges(path, jobs)
+                self.assertEqual(ranges[0][0], 0)
+                self.assertEqual(ranges[-1][1], len(text))
+                for start, end in ranges[1:]:
+                    self.assertTrue(text[start:].startswith('0 '))
+                    self.assertEqual(text[start - 1], '\n')
+
+                chunked, chunked_families = parse_parallel(path, jobs)
+                self.assertEqual([x.uid for x in chunked_families],
+                                 [x.uid for x in families])
+                self.assertEqual(len(chunked), len(individuals))
+                for record, other in zip(individuals, chunked):
+                    for field in fields:
+                        self.assertEqual(getattr(record, field),
+                                         getattr(other, field))
+        else:
+            print "!!default_ged.ged not found"
+
+    def test_parse_date(self):
+        """ Unit test for parse_date """
+
+        self.assertEqual(parse_date("9 MAR 1990"), datetime(1990, 3, 9))
+        self.assertTrue(parse_date("9 MAR 1990").is_exact())
+
+        partial = parse_date("MAR 1880")
+        self.assertEqual((partial.low, partial.high),
+                         (datetime(1880, 3, 1), datetime(1880, 3, 31)))
+
+        about = parse_date("ABT 1850")
+        self.assertEqual(about.qualifier, "ABT")
+        self.assertEqual(about.high, datetime(1850, 12, 31))
+
+        before = parse_date("BEF 3 MAR 1901")
+        self.assertEqual((before.low, before.high),
+                         (None, datetime(1901, 3, 2)))
+
+        between = parse_date("BET 1800 AND 1810")
+        self.assertTrue(between < parse_date("1 JAN 1801"))
+        self.assertEqual(between.high, datetime(1810, 12, 31))
+
+        self.assertIsNone(parse_date("30 FEB 1900"))
+        self.assertIsNone(parse_date("(unknown)"))
+
+        # A leading calendar escape is dropped with or without a qualifier
+        self.assertEqual(parse_date("@#DGREGORIAN@ 1 MAR 1750"),
+                         datetime(1750, 3, 1))
+        self.assertTrue(parse_date("@#DGREGORIAN@ 1 MAR 1750").is_exact())
+        self.assertEqual(parse_date("ABT @#DGREGORIAN@ 1 MAR 1750"),
+                         datetime(1750, 3, 1))
+
+        # A period open at one end has no bound there
+        until = parse_date("TO 1900")
+        self.assertEqual((until.low, until.high),
+                         (None, datetime(1900, 12, 31)))
+        since = parse_date("FROM 1900")
+        self.assertEqual((since.low, since.high),
+                         (datetime(1900, 1, 1), None))
+        period = parse_date("FROM 1900 TO 1905")
+        self.assertEqual((period.low, period.high),
+                         (datetime(1900, 1, 1), datetime(1905, 12, 31)))
+
+    def test_day_range(self):
+        """ Unit test for dates that are not a single day """
+
+        day = parse_ordinal("9 MAR 1990")
+        self.assertIs(type(day), int)
+        self.assertEqual((earliest(day), latest(day)), (day, day))
+        year = parse_ordinal("1880")
+        self.assertEqual(year, DayRange(datetime(1880, 1, 1).toordinal(),
+                                        datetime(1880, 1, 1).toordinal(),
+                                        datetime(1880, 12, 31).toordinal()))
+        self.assertNotEqual(year, parse_ordinal("1 JAN 1880"))
+        self.assertEqual(latest(parse_ordinal("BEF 1 JAN 1900")),
+                         datetime(1899, 12, 31).toordinal())
+        self.assertEqual(earliest(parse_ordinal("TO 1 JAN 1900")),
+                         FIRST_DAY)
+        self.assertEqual(latest(parse_ordinal("FROM 1 JAN 1900")),
+                         LAST_DAY)
+        self.assertEqual(pickle.loads(pickle.dumps(year, 2)).high,
+                         year.high)
+
+        # Only dates that cannot be reconciled are reported
+        lines = ["0 @F1@ FAM", "1 CHIL @I1@", "1 CHIL @I2@", "1 CHIL @I3@"]
+        for uid, birth, death in (("@I1@", "1880", "1880"),
+                                  ("@I2@", "MAR 1880", "BEF 1881"),
+                                  ("@I3@", "ABT 1882", "1881")):
+            lines += ["0 %s INDI" % uid, "1 BIRT", "2 DATE " + birth,
+                      "1 DEAT", "2 DATE " + death, "1 FAMC @F1@"]
+        db = ged_database(lines)
+        result = ValidationResult()
+        self.assertTrue(sibling_spacing(db, result))
+        self.assertFalse(birth_before_death(db, result))
+        self.assertEqual([finding.locations for finding in result.findings],
+                         [["@I3@"]])
+
+        # Ranges survive the parse cache and the columnar table
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "ranges.ged")
+            with open(path, 'w') as ged_file:
+                ged_file.write('\n'.join(lines) + '\n')
+            individuals, _ = parse_ged(path)
+            cache = ParseCache(os.path.join(directory, "cache"))
+            parse_cached(path, cache)
+            cached, _ = parse_cached(path, cache)
+            rows, _ = parse_table(path).records()
+            for loaded in (cached, rows):
+                self.assertEqual([(x.birthdate, x.death) for x in loaded],
+                                 [(x.birthdate, x.death)
+                                  for x in individuals])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_parse_table(self):
+        """ Unit test for parse_table """
+
+        path = "default_ged.ged"
+        fields = ['uid', 'int_id', 'name', 'given', 'surname', 'sex',
+                  'birthdate', 'death', 'famc', 'fams', 'marriage', 'divorce',
+                  'husband', 'wife', 'children']
+
+        if os.path.exists(path):
+            individuals, families = parse_ged(path)
+            table = parse_table(path)
+            rows, fam_rows = table.records()
+            self.assertEqual(len(rows), len(individuals))
+            self.assertEqual(len(fam_rows), len(families))
+            for record, row in zip(individuals + families,
+                                   list(rows) + list(fam_rows)):
+                for field in fields:
+                    if hasattr(record, field):
+                        self.assertEqual(getattr(record, field),
+                                         getattr(row, field))
+            self.assertEqual(table.individual_row("@I3@"), 2)
+            self.assertTrue(marriage_age(GedcomDatabase(rows, fam_rows)))
+        else:
+            print "!!default_ged.ged not found"
+
+        # Xrefs kept as strings, huge numbers and names other than
+        # 'given /surname/' come back unchanged too
+        lines = ["0 @I007@ INDI", "1 NAME Ann /Lee/ Jr", "1 FAMC @F7A@",
+                 "0 @I999999999@ INDI", "1 NAME Bob", "1 FAMS @F7A@",
+                 "0 @I2@ INDI", "1 NAME /Lee/", "1 FAMS @F7A@",
+                 "0 @F7A@ FAM", "1 HUSB @I999999999@", "1 WIFE @I2@",
+                 "1 CHIL @I007@", "1 CHIL @I3@"]
+        db = ged_database(lines)
+        table = parse_table(StringIO('\n'.join(lines) + '\n'))
+        table_db = GedcomDatabase.from_table(table)
+        for records, rows in ((db.individuals, table_db.individuals),
+                              (db.families, table_db.families)):
+            for record, row in zip(records, rows):
+                for field in fields:
+                    if hasattr(record, field):
+                        self.assertEqual(getattr(record, field),
+                                         getattr(row, field))
+        for uid in ("@I007@", "@I999999999@", "@I2@", "@I3@", "@F7A@"):
+            self.assertEqual(table_db.individual(uid), table_db.individual(uid))
+            self.assertEqual(table_db.individual(uid) is None,
+                             db.individual(uid) is None)
+            self.assertEqual(table_db.family(uid) is None,
+                             db.family(uid) is None)
+            for lookup in ('spouse_families', 'child_families'):
+                self.assertEqual(
+                    [family.uid for family in getattr(table_db, lookup)(uid)],
+                    [family.uid for family in getattr(db, lookup)(uid)])
+        self.assertEqual([child.uid for child in
+                          table_db.children(table_db.family("@F7A@"))],
+                         ["@I007@"])
+
+    def test_family_graph(self):
+        """ Unit test for FamilyGraph """
+
+        path = FAIL_DIR + "no_marriage_to_decendants.ged"
+
+        if os.path.exists(path):
+            db = GedcomDatabase(*parse_ged(path))
+            for bitsets in (False, True):
+                graph = FamilyGraph(db, bitsets=bitsets)
+                self.assertEqual(graph.descendants("@I1@"),
+                                 set(["@I3@", "@I5@"]))
+                self.assertEqual(graph.ancestors("@I5@"),
+                                 set(["@I1@", "@I2@", "@I3@", "@I4@"]))
+                self.assertTrue(graph.is_descendant("@I5@", "@I1@"))
+                self.assertFalse(graph.is_descendant("@I1@", "@I5@"))
+        else:
+            print "!!no_marriage_to_decendants acceptance file not found"
+
+    def test_split_name(self):
+        """ Unit test for split_name and normalise_name """
+
+        self.assertEqual(split_name(["John", "/Smith/"]), ("John", "Smith"))
+        self.assertEqual(split_name(["John", "Paul", "/Smith/", "Jr"]),
+                         ("John Paul", "Smith"))
+        self.assertEqual(split_name(["Madonna"]), ("Madonna", ""))
+        self.assertEqual(normalise_name(["John", "/Smith/"]), "john smith")
+
+    def test_date_columns(self):
+        """ Unit test for the NumPy date user stories matching the loops """
+
+        acceptfs = ["date_before_current.ged", "birth_before_death.ged",
+                    "marriage_before_divorce.ged", "age_less_150.ged"]
+        rules = [dates_before_current, birth_before_death,
+                 marriage_before_divorce, age_less_150]
+
+        if GedcomDatabase([], []).date_columns is None:
+            print "!!NumPy not installed"
+            return
+
+        for acceptf in acceptfs:
+            path = FAIL_DIR + acceptf
+            if not os.path.exists(path):
+                print "!!%s acceptance file not found" % acceptf
+                continue
+            records = parse_ged(path)
+            for rule in rules:
+                results = []
+                for vectorised in (False, True):
+                    result = ValidationResult()
+                    db = GedcomDatabase(*records, vectorised=vectorised)
+                    results.append((rule(db, result), result.findings))
+                self.assertEqual(results[0], results[1])
+
+            # Over a table the columns are the table's own arrays
+            table = parse_table(path)
+            columns = GedcomDatabase.from_table(table).date_columns
+            for name in ('birth', 'death', 'marriage', 'divorce'):
+                column = getattr(columns, name)
+                if len(column):
+                    self.assertEqual(column.ctypes.data,
+                                     getattr(table, name).buffer_info()[0])
+
+    def test_select_rules(self):
+        """ Unit test for the user story registry """
+
+        for rule in RULES:
+            self.assertIn(rule.story, rule.check.__doc__)
+
+        self.assertEqual(len(select_rules()), len(RULES))
+        self.assertEqual([rule.story for rule in select_rules(["US11",
+                                                               "US01"])],
+                         ["US01", "US11"])
+        self.assertNotIn("US17", [rule.story
+                                  for rule in select_rules(skip=["US17"])])
+        self.assertRaises(ValueError, select_rules, ["US99"])
+
+        path = FAIL_DIR + "no_marriage_to_decendants.ged"
+        if os.path.exists(path):
+            # Only the indexes of the selected rules are built
+            db = GedcomDatabase(*parse_ged(path))
+            validation(db, select_rules(["US11"]))
+            self.assertIsNotNone(db._timelines)
+            self.assertIsNone(db._graph)
+            self.assertIsNone(db._sibling_groups)
+        else:
+            print "!!no_marriage_to_decendants acceptance file not found"
+
+    def test_run_fused(self):
+        """ Unit test for the fused validator matching run_rules """
+
+        paths = sorted(glob.glob(FAIL_DIR + "*.ged"))
+        if not paths:
+            print "!!fail acceptance files not found"
+
+        for path in paths:
+            records = parse_ged(path)
+            for vectorised in (False, True):
+                found = []
+                for run in (run_rules, run_fused):
+                    db = GedcomDatabase(*records, vectorised=vectorised)
+                    result = run(db, RULES)
+                    found.append((result.passed, sorted(result.findings)))
+                self.assertEqual(found[0], found[1], path)
+
+    def test_validation_result(self):
+        """ Unit test for collecting findings in a ValidationResult """
+
+        path = FAIL_DIR + "birth_before_death.ged"
+
+        if os.path.exists(path):
+            db = GedcomDatabase(*parse_ged(path))
+            result = ValidationResult()
+            self.assertFalse(birth_before_death(db, result))
+            self.assertEqual(result.findings,
+                             [Finding("US03", ERROR,
+                                      "Birth occurs before death.",
+                                      ["@I2@"])])
+            self.assertEqual(result.locations(ERROR), ["@I2@"])
+
+            # Each run starts from an empty result
+            first = run_rules(db, select_rules(["US03"]))
+            second = run_rules(db, select_rules(["US03"]))
+            self.assertEqual(first.findings, second.findings)
+            self.assertEqual(second.passed, {"US03": False})
+        else:
+            print "!!birth_before_death acceptance file not found"
+
+    def test_reporters(self):
+        """ Unit test for the text, JSON Lines and CSV reporters """
+
+        path = FAIL_DIR + "no_bigamy.ged"
+
+        if os.path.exists(path):
+            outputs = []
+            for reporter in (TextReporter, JsonLinesReporter, CsvReporter):
+                stream = StringIO()
+                db = GedcomDatabase(*parse_ged(path))
+                result = validation(db, select_rules(["US11", "US22"]),
+                                    reporter=reporter(stream, 1))
+                outputs.append(stream.getvalue())
+            text, jsonl, csv_text = outputs
+
+            self.assertIn("ERROR    US22   Family ID already exists"
+                          "                              @F1@      \n",
+                          text)
+            self.assertEqual([json.loads(line)["story"]
+                              for line in jsonl.splitlines()],
+                             ["US11", "US22"])
+            rows = list(csv.DictReader(StringIO(csv_text)))
+            self.assertEqual([row["story"] for row in rows],
+                             ["US11", "US22"])
+            self.assertEqual(rows[0]["locations"].split(),
+                             result.findings[0].locations)
+        else:
+            print "!!no_bigamy acceptance file not found"
+
+        # The family of a husband without a wife is located with None
+        finding = Finding("US01", ERROR, "Marriage occurs after current date",
+                          ["@F1@", "@I1@", None])
+        lines = [''.join(reporter(StringIO()).format(finding))
+                 for reporter in (TextReporter, JsonLinesReporter)]
+        self.assertTrue(lines[0].startswith(
+            "ERROR    US01   Marriage occurs after current date"
+            "                    @F1@,@I1@ \n"))
+        self.assertEqual(json.loads(lines[1])["locations"],
+                         ["@F1@", "@I1@", None])
+        stream = StringIO()
+        reporter = CsvReporter(stream)
+        reporter.write([finding])
+        reporter.flush()
+        self.assertEqual(stream.getvalue(),
+                         "US01,ERROR,Marriage occurs after current date,"
+                         "@F1@ @I1@ \n")
+
+    def test_run_parallel(self):
+        """ Unit test for the parallel validator matching run_rules """
+
+        for acceptf in ("no_bigamy.ged", "no_ancestry_cycles.ged",
+                        "sibling_spacing.ged"):
+            path = FAIL_DIR + acceptf
+            if not os.path.exists(path):
+                print "!!%s acceptance file not found" % acceptf
+                continue
+            records = parse_ged(path)
+            serial = run_rules(GedcomDatabase(*records), RULES)
+            parallel = run_parallel(GedcomDatabase(*records), RULES, 3)
+            self.assertEqual(serial.passed, parallel.passed)
+            self.assertEqual(serial.findings, parallel.findings)
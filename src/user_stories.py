@@ -3,801 +3,1032 @@
     This file provides the user stories for the GEDCOM parsing project
 """
 
-from datetime import datetime, timedelta
-from collections import Counter
-import re
-
-error_locations = []
-anomaly_locations = []
-
-
-def validation(individuals, families):
-    """ Validation check to run all user stories """
-    marriage_age(individuals, families)
-
-    print "ERRORS/ANOMALIES".center(80, ' ')
-    print "\nError/Anom:     Description:                                     "\
-        "     Location"
-    print '-' * 80
-
-    dates_before_current(individuals, families)
-    birth_before_marriage(individuals, families)
-    birth_before_death(individuals)
-    marriage_before_divorce(families)
-    marriage_before_death(individuals, families)
-    divorce_before_death(individuals, families)
-
-    # Sprint 2
-    age_less_150(individuals)
-    birth_before_marriage_of_parents(individuals, families)
-    birth_before_death_of_parents(individuals, families)
-    marriage_age(individuals, families)
-    parents_not_too_old(individuals, families)
-    no_bigamy(individuals, families)
-
-    # Sprint 3
-    sibling_spacing(individuals, families)
-    multiple_births_less_5(individuals, families)
-    fewer_than_fifteen_siblings(individuals, families)
-    male_last_names(individuals, families)
-    no_sibling_marriage(individuals, families)
-    no_marriage_to_decendants(individuals, families)
-
-    # Sprint 4
-    correct_gender_for_role(individuals, families)
-    unique_ids(individuals, families)
-
-    print "\n-------------------------------"
-    print "\nDeceased Individuals:"
-    for x in list_deceased(individuals, families):
-        print " ".join(x.name)
-    print "-------------------------------"
-
-    print "\nLiving Married Individuals:"
-    for x in list_living_married(individuals, families):
-        print " ".join(x.name)
-    print "-------------------------------"
-
-
-def report(rtype, number, description, location):
-    """ Reports rtype to console """
-
-    rtype2, num2, description2, location2 = "", "", "", ""
-    report_again_flag = False
-
-    if isinstance(location, list):
-        location = ','.join(location)
-
-    if len(rtype) > 7 or len(number) > 5 or len(description) > 50 \
-            or len(' '.join(location)) > 10:
-
-        rtype2 = rtype[7:]
-        num2 = number[5:]
-        description2 = description[50:]
-        location2 = location[10:]
-        report_again_flag = True
-
-    estr = '{:7.7s}  {:5.5s}  {:50.50s}    {:10.10s}'\
-        .format(rtype, number, description, location)
-    print estr
-
-    if report_again_flag:
-        report(rtype2, num2, description2, location2)
-
-
-def report_anomaly(atype, description, locations):
-    """ Reports an anomaly to console """
-
-    report("ANOMALY", atype, description, locations)
-    anomaly_locations.extend(locations)
-
+from collections import OrderedDict, namedtuple
+from dates import UNKNOWN, today, years_ago, earliest, latest
+from names import normalise_name
+from findings import ERROR, ANOMALY, LISTING, ValidationResult
+from reporter import TextReporter
+from parallel import run_parallel
+
+DAYS_IN_150_YEARS = 54750
+DAYS_IN_9_MONTHS = 266
+DAYS_IN_8_MONTHS = 243
+
+# Stored dates compare by their representative day. A finding is reported
+# only when the ranges of the dates (see dates.DayRange) cannot satisfy the
+# story, and then the representative days cannot either, so the stories
+# compare those first and look at earliest() and latest() only if needed.
+
+# A registered user story: its id, severity, the function taking a
+# GedcomDatabase and a ValidationResult, the factory of its per-record
+# checks (None if it can only run over the whole database), the lazy
+# GedcomDatabase indexes it uses, its title and, for a story over the whole
+# database, the record fields it reads (None if any field may matter)
+Rule = namedtuple('Rule', ('story', 'severity', 'check', 'checks', 'indexes',
+                           'title', 'fields'))
+Rule.__new__.__defaults__ = (None,)
+
+
+def validation(db, rules=None, fused=False, reporter=None, jobs=1):
+    """ Validation check to run the user stories in rules (default all of
+    RULES) on a GedcomDatabase, one after another, fused (see run_fused)
+    or on jobs worker processes (see run_parallel), writing the findings
+    to reporter (default a TextReporter on stdout). Returns the
+    ValidationResult. """
+    if rules is None:
+        rules = RULES
+    if reporter is None:
+        reporter = TextReporter()
+
+    reporter.begin()
+
+    # Indexes are lazy, so only those the selected rules need get built
+    if jobs > 1:
+        result = run_parallel(db, rules, jobs, reporter)
+    elif fused:
+        result = run_fused(db, rules, reporter)
+    else:
+        result = run_rules(db, rules, reporter)
+
+    for rule in rules:
+        if rule.severity == LISTING:
+            result.listings[rule.story] = (rule.title, rule.check(db))
+
+    reporter.end(result)
+    return result
+
+
+def run_rules(db, rules, reporter=None):
+    """ Runs each checking rule in turn, passing the findings of each to
+    reporter as soon as it finishes. Returns a ValidationResult. """
+    result = ValidationResult()
+    for rule in rules:
+        if rule.severity != LISTING:
+            start = len(result.findings)
+            result.passed[rule.story] = rule.check(db, result)
+            if reporter is not None:
+                reporter.write(result.findings[start:])
+    return result
+
+
+def run_fused(db, rules, reporter=None):
+    """ Runs the checking rules with one pass over the families and one
+    over the individuals, calling the per-record checks of every rule on
+    each record in turn. Rules without per-record checks (those over the
+    graph, marriage timelines, sibling groups or groupings of the whole
+    file) and rules NumPy already evaluates over the date columns then run
+    whole.
+
+    Per-record checks are given the record together with its husband and
+    wife (families) or its parents' family (individuals), so those are
+    looked up once per record rather than once per rule. Findings are
+    put back in rule order, so they match run_rules except that within a
+    rule they are in record order. They are passed to reporter once all
+    have run. Returns a ValidationResult. """
+    result = ValidationResult()
+    individual_checks = []
+    family_checks = []
+    whole = []
+
+    for rule in rules:
+        if rule.severity == LISTING:
+            continue
+        result.passed[rule.story] = True
+        if rule.checks is None or ("date_columns" in rule.indexes and
+                                   db.date_columns is not None):
+            whole.append(rule)
+            continue
+        for_individuals, for_families = rule.checks(db, result)
+        individual_checks.extend((rule.story, check)
+                                 for check in for_individuals)
+        family_checks.extend((rule.story, check) for check in for_families)
+
+    # Each record's spouses or parents are looked up once for all checks
+    if family_checks:
+        for family in db.families:
+            husband = db.individual(family.husband)
+            wife = db.individual(family.wife)
+            for story, check in family_checks:
+                if not check(family, husband, wife):
+                    result.passed[story] = False
+
+    if individual_checks:
+        for individual in db.individuals:
+            parents = _parents(db, individual)
+            for story, check in individual_checks:
+                if not check(individual, parents):
+                    result.passed[story] = False
+
+    for rule in whole:
+        result.passed[rule.story] = rule.check(db, result)
+
+    order = dict((rule.story, index) for index, rule in enumerate(rules))
+    result.findings.sort(key=lambda finding: order[finding.story])
+    if reporter is not None:
+        reporter.write(result.findings)
+    return result
+
+
+def select_rules(only=None, skip=None):
+    """ Returns the registered rules, in run order, whose story ids are in
+    only (default all) and not in skip. Raises ValueError naming any
+    unknown story id. """
+    known = set(rule.story for rule in RULES)
+    unknown = sorted(set(only or ()).union(skip or ()) - known)
+    if unknown:
+        raise ValueError("Unknown user story: " + ', '.join(unknown))
+
+    return [rule for rule in RULES
+            if (only is None or rule.story in only) and
+            (skip is None or rule.story not in skip)]
+
+
+def report_anomaly(result, atype, description, locations):
+    """ Records an anomaly in result, if there is one """
+    if result is not None:
+        result.anomaly(atype, description, locations)
+
+
+def report_error(result, etype, description, locations):
+    """ Records an error in result, if there is one """
+    if result is not None:
+        result.error(etype, description, locations)
+
+
+def _parents(db, individual):
+    """ Returns the Family individual is a child of (the first, if several)
+    or None """
+    return db.family(individual.famc[0]) if individual.famc else None
+
+
+def _check_individuals(db, check, individuals):
+    """ Runs a per-individual check on every individual. Returns False if
+    any failed. """
+    return_flag = True
+    for individual in individuals:
+        if not check(individual, _parents(db, individual)):
+            return_flag = False
+    return return_flag
 
-def report_error(etype, description, locations):
-    """ Reports an error to console """
 
-    report("ERROR", etype, description, locations)
-    error_locations.extend(locations)
+def _check_families(db, check, families):
+    """ Runs a per-family check on every family. Returns False if any
+    failed. """
+    return_flag = True
+    for family in families:
+        if not check(family, db.individual(family.husband),
+                     db.individual(family.wife)):
+            return_flag = False
+    return return_flag
 
 ### USER STORIES IN-ORDER BELOW ###
 
 
-def dates_before_current(individuals, families):
+def dates_before_current(db, result=None):
     """ US01 All dates must be before the current date - ERROR"""
 
-    return_flag = True
+    current = today()
+    families, individuals = db.families, db.individuals
+
+    # With NumPy only the records with a future date need checking
+    columns = db.date_columns
+    if columns is not None:
+        families = columns.families_where((columns.marriage > current) |
+                                          (columns.divorce > current))
+        individuals = columns.individuals_where((columns.birth > current) |
+                                                (columns.death > current))
+
+    (individual_check,), (family_check,) = \
+        _dates_before_current_checks(db, result)
+    return_flag = _check_families(db, family_check, families)
+    return_flag &= _check_individuals(db, individual_check, individuals)
+    return return_flag
+
+
+def _dates_before_current_checks(db, result):
+    """ Per-record checks for US01 """
     error_type = "US01"
+    current = today()
+
     # date of birth, death, marriage, or divorce must be before current date
-    for family in families:
-        if family.marriage and family.marriage > datetime.now():
+    def family_check(family, husband, wife):
+        return_flag = True
+        if family.marriage > current and earliest(family.marriage) > current:
             error_descrip = "Marriage occurs after current date"
             error_location = [family.uid, family.husband, family.wife]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
 
-        if family.divorce and family.divorce > datetime.now():
+        if family.divorce > current and earliest(family.divorce) > current:
             error_descrip = "Divorce occurs after current date"
             error_location = [family.uid, family.husband, family.wife]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
+        return return_flag
 
-    for indiv in individuals:
-        if indiv.birthdate and indiv.birthdate > datetime.now():
+    def individual_check(indiv, parents):
+        return_flag = True
+        if indiv.birthdate > current and earliest(indiv.birthdate) > current:
             error_descrip = "Birth occurs after current date"
             error_location = [indiv.uid]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
 
-        if indiv.death and indiv.death > datetime.now():
+        if indiv.death > current and earliest(indiv.death) > current:
             error_descrip = "Death occurs after current date"
             error_location = [indiv.uid]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
+        return return_flag
 
-    return return_flag
+    return [individual_check], [family_check]
 
 
-def birth_before_marriage(individuals, families):
+def birth_before_marriage(db, result=None):
     """ US02 - Birth should occur before marriage of that individual - ERROR"""
 
-    # For each individual check if birth occurs before marriage
-    return_flag = True
+    _, (family_check,) = _birth_before_marriage_checks(db, result)
+    return _check_families(db, family_check, db.families)
+
+
+def _birth_before_marriage_checks(db, result):
+    """ Per-record checks for US02 """
     error_type = "US02"
-    for family in families:
+
+    # For each individual check if birth occurs before marriage
+    def family_check(family, husband, wife):
+        return_flag = True
         if family.marriage:
-            # Search through individuals to get husband and wife
-            husband = None
-            wife = None
-            for indiv in individuals:
-                if indiv.uid == family.husband:
-                    husband = indiv
-                if indiv.uid == family.wife:
-                    wife = indiv
-
-            if wife.birthdate and wife.birthdate > family.marriage:
+            if wife and wife.birthdate > family.marriage and \
+                    earliest(wife.birthdate) > latest(family.marriage):
                 # Found a case spouse marries before birthday
                 error_descrip = "Birth of wife occurs after marriage"
                 error_location = [wife.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
 
-            if husband.birthdate and husband.birthdate > family.marriage:
+            if husband and husband.birthdate > family.marriage and \
+                    earliest(husband.birthdate) > latest(family.marriage):
                 error_descrip = "Birth of husband occurs after marraige"
                 error_location = [husband.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
+        return return_flag
 
-    return return_flag
+    return [], [family_check]
 
 
-def birth_before_death(individuals):
+def birth_before_death(db, result=None):
     """ US03 - Birth should occur before death of an individual - ERROR"""
-    # For each individual check if death occurs before death
-    return_flag = True
+    individuals = db.individuals
+
+    columns = db.date_columns
+    if columns is not None:
+        individuals = columns.individuals_where(
+            (columns.death != UNKNOWN) & (columns.death < columns.birth))
+
+    (individual_check,), _ = _birth_before_death_checks(db, result)
+    return _check_individuals(db, individual_check, individuals)
+
+
+def _birth_before_death_checks(db, result):
+    """ Per-record checks for US03 """
     error_type = "US03"
-    for individual in individuals:
+
+    # For each individual check if death occurs before death
+    def individual_check(individual, parents):
         if individual.death and individual.birthdate:
-            if individual.death < individual.birthdate:
+            if individual.death < individual.birthdate and \
+                    latest(individual.death) < earliest(individual.birthdate):
                 error_descrip = "Birth occurs before death."
                 error_location = [individual.uid]
-                report_error(error_type, error_descrip, error_location)
-                return_flag = False
-    return return_flag
+                report_error(result, error_type, error_descrip, error_location)
+                return False
+        return True
+
+    return [individual_check], []
 
 
-def marriage_before_divorce(families):
+def marriage_before_divorce(db, result=None):
     """ US04 - Marriage should occur before divorce - ERROR"""
+    families = db.families
 
-    # Search though the families
-    return_flag = True
+    columns = db.date_columns
+    if columns is not None:
+        families = columns.families_where((columns.divorce != UNKNOWN) &
+                                          (columns.marriage > columns.divorce))
+
+    _, (family_check,) = _marriage_before_divorce_checks(db, result)
+    return _check_families(db, family_check, families)
+
+
+def _marriage_before_divorce_checks(db, result):
+    """ Per-record checks for US04 """
     error_type = "US04"
-    for family in families:
+
+    def family_check(family, husband, wife):
         # Check if family has marriage and divorce dates
         if family.marriage and family.divorce:
-            if family.marriage > family.divorce:
+            if family.marriage > family.divorce and \
+                    earliest(family.marriage) > latest(family.divorce):
                 error_descrip = "Marriage occurs after divorce"
                 error_location = [family.uid, family.husband, family.wife]
-                report_error(error_type, error_descrip, error_location)
-                return_flag = False
-    return return_flag
+                report_error(result, error_type, error_descrip, error_location)
+                return False
+        return True
+
+    return [], [family_check]
 
 
-def marriage_before_death(individuals, families):
+def marriage_before_death(db, result=None):
     """ US05 - Marriage should occur before death of either spouse - ERROR"""
 
-    # For each family find spouses IDs
+    _, (family_check,) = _marriage_before_death_checks(db, result)
+    return _check_families(db, family_check, db.families)
+
+
+def _marriage_before_death_checks(db, result):
+    """ Per-record checks for US05 """
     error_type = "US05"
-    return_flag = True
-    for family in families:
+
+    # For each family find spouses IDs
+    def family_check(family, husband, wife):
+        return_flag = True
         if family.marriage:
-            # Search through individuals to get husband and wife
-            husband = None
-            wife = None
-            for indiv in individuals:
-                if indiv.uid == family.husband:
-                    husband = indiv
-                if indiv.uid == family.wife:
-                    wife = indiv
-            if wife.death is not None and family.marriage > wife.death:
+            if wife and wife.death and family.marriage > wife.death and \
+                    earliest(family.marriage) > latest(wife.death):
                 error_descrip = "Marriage occurs after death of wife"
                 error_location = [family.uid, wife.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-            if husband.death is not None and family.marriage > husband.death:
+            if husband and husband.death and \
+                    family.marriage > husband.death and \
+                    earliest(family.marriage) > latest(husband.death):
                 error_descrip = "Marriage occurs after death of husband"
                 error_location = [family.uid, husband.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-    return return_flag
+        return return_flag
+
+    return [], [family_check]
 
 
-def divorce_before_death(individuals, families):
+def divorce_before_death(db, result=None):
     """ US06 - Divorce should occur before death of either spouse - ERROR"""
 
-    return_flag = True
+    _, (family_check,) = _divorce_before_death_checks(db, result)
+    return _check_families(db, family_check, db.families)
+
+
+def _divorce_before_death_checks(db, result):
+    """ Per-record checks for US06 """
     error_type = "US06"
-    for family in families:
-        if family.divorce:
-            # Search through individuals to get husband and wife
-            husband = None
-            wife = None
-            for indiv in individuals:
-                if indiv.uid == family.husband:
-                    husband = indiv
-                if indiv.uid == family.wife:
-                    wife = indiv
 
+    def family_check(family, husband, wife):
+        return_flag = True
+        if family.divorce:
             # Found a case where spouse death before divorce
-            if wife.death is not None and family.divorce > wife.death:
+            if wife and wife.death and family.divorce > wife.death and \
+                    earliest(family.divorce) > latest(wife.death):
                 error_descrip = "Divorce occurs after death of wife"
                 error_location = [family.uid, wife.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-            if husband.death is not None and family.divorce > husband.death:
+            if husband and husband.death and \
+                    family.divorce > husband.death and \
+                    earliest(family.divorce) > latest(husband.death):
                 error_descrip = "Divorce occurs after death of husband"
                 error_location = [family.uid, husband.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-    return return_flag
+        return return_flag
+
+    return [], [family_check]
 
 
-def age_less_150(individuals):
+def age_less_150(db, result=None):
     """  US07 - Age should be less than 150 years for deceased and alive"""
-    return_flag = True
+    current = today()
+    deceased = living = db.individuals
+
+    columns = db.date_columns
+    if columns is not None:
+        too_old = (columns.birth != UNKNOWN) & \
+            (columns.birth + DAYS_IN_150_YEARS < columns.death)
+        deceased = columns.individuals_where(too_old)
+        too_old = (columns.birth != UNKNOWN) & (columns.death == UNKNOWN) & \
+            (columns.birth + DAYS_IN_150_YEARS < current)
+        living = columns.individuals_where(too_old)
+
+    (deceased_check, living_check), _ = _age_less_150_checks(db, result)
+    return_flag = _check_individuals(db, deceased_check, deceased)
+    return_flag &= _check_individuals(db, living_check, living)
+    return return_flag
+
+
+def _age_less_150_checks(db, result):
+    """ Per-record checks for US07 """
     error_type = "US07"
+    current = today()
+
     # For each decesaded individual check age if age is over 150
-    for individual in individuals:
+    def deceased_check(individual, parents):
         if individual.death and individual.birthdate:
-            if individual.birthdate + timedelta(days=54750) < individual.death:
+            if individual.birthdate + DAYS_IN_150_YEARS < \
+                    individual.death and \
+                    latest(individual.birthdate) + DAYS_IN_150_YEARS < \
+                    earliest(individual.death):
                 error_descrip = "Individual dies over 150 years of age"
                 error_location = [individual.uid]
-                report_error(error_type, error_descrip, error_location)
-                return_flag = False
+                report_error(result, error_type, error_descrip, error_location)
+                return False
+        return True
 
     # For each living individual, check age
-    for individual in individuals:
-        if individual.death is None and individual.birthdate:
-            if individual.birthdate + timedelta(days=54750) < datetime.now():
+    def living_check(individual, parents):
+        if not individual.death and individual.birthdate:
+            if individual.birthdate + DAYS_IN_150_YEARS < current and \
+                    latest(individual.birthdate) + DAYS_IN_150_YEARS < current:
                 error_descrip = "Living Individual over 150 years old"
                 error_location = [individual.uid]
-                report_error(error_type, error_descrip, error_location)
-                return_flag = False
-    return return_flag
+                report_error(result, error_type, error_descrip, error_location)
+                return False
+        return True
+
+    return [deceased_check, living_check], []
 
 # Should this be done based off of date of conception or birth?
 # user story from team report says birthdate
 
 
-def birth_before_marriage_of_parents(individuals, families):
+def birth_before_marriage_of_parents(db, result=None):
     """ US08 - Birth should occur after the marriage of parents """
-    return_flag = True
+
+    (individual_check,), _ = \
+        _birth_before_marriage_of_parents_checks(db, result)
+    return _check_individuals(db, individual_check, db.individuals)
+
+
+def _birth_before_marriage_of_parents_checks(db, result):
+    """ Per-record checks for US08 """
     anom_type = "US08"
 
-    # Loop through individuals to compare their brithdate
+    # Compare each individual's brithdate
     # with the marriage/divorce dates of their parents
-    for individual in individuals:
+    def individual_check(individual, parents):
+        return_flag = True
 
         # Some individuals do not have parents defined
         # if they are the oldest generation in the gedcom file,
-        # so check if individual.famc has elements before proceeding
-        if len(individual.famc) > 0:
-
-            # locate family of individual
-            for family in families:
-                if family.uid == individual.famc[0]:
-                    # Checks for a child born before marriage
-                    if family.marriage:
-                        if family.marriage > individual.birthdate:
-                            anom_description = "Child is born before marriage "
-                            anom_location = [individual.uid, family.uid]
-                            report_anomaly(anom_type, anom_description, anom_location)
-                            return_flag = False
-                    # checks for child born after divorce
-                    if family.marriage and family.divorce:
-                        if family.divorce < individual.birthdate:
-                            anom_description = "Child is born after divorce "
-                            anom_location = [individual.uid, family.uid]
-                            report_anomaly(anom_type, anom_description, anom_location)
-                            return_flag = False
+        # so check the individual has a family before proceeding
+        family = parents
+        if family is not None:
+
+            # Checks for a child born before marriage
+            if family.marriage:
+                if family.marriage > individual.birthdate and \
+                        earliest(family.marriage) > \
+                        latest(individual.birthdate):
+                    anom_description = "Child is born before marriage "
+                    anom_location = [individual.uid, family.uid]
+                    report_anomaly(result, anom_type, anom_description,
+                                   anom_location)
+                    return_flag = False
+            # checks for child born after divorce
+            if family.marriage and family.divorce:
+                if family.divorce < individual.birthdate and \
+                        latest(family.divorce) < \
+                        earliest(individual.birthdate):
+                    anom_description = "Child is born after divorce "
+                    anom_location = [individual.uid, family.uid]
+                    report_anomaly(result, anom_type, anom_description,
+                                   anom_location)
+                    return_flag = False
+        return return_flag
 
-    return return_flag
+    return [individual_check], []
 
 
-def birth_before_death_of_parents(individuals, families):
+def birth_before_death_of_parents(db, result=None):
     """ US09 - Birth should occur before the death of parents """
-    return_flag = True
+
+    (individual_check,), _ = _birth_before_death_of_parents_checks(db, result)
+    return _check_individuals(db, individual_check, db.individuals)
+
+
+def _birth_before_death_of_parents_checks(db, result):
+    """ Per-record checks for US09 """
     error_type = "US09"
 
-    # Loop through individuals to compare their brithdate
+    # Compare each individual's brithdate
     # with the death date of their parents
-    for individual in individuals:
+    def individual_check(individual, parents):
+        return_flag = True
 
         # Some individuals do not have parents defined
         # if they are the oldest generation in the gedcom file,
-        # so check if individual.famc has elements before proceeding
-        if len(individual.famc) > 0:
-            father = None
-            father_id = None
-            mother = None
-            mother_id = None
-            fam = None
-
-            # Get the UID of parents for an individual
-            for family in families:
-                if family.uid == individual.famc[0]:
-                    father_id = family.husband
-                    mother_id = family.wife
-                    fam = family
-                    break
+        # so check the individual has a family before proceeding
+        fam = parents
+        if fam is not None:
 
             # Get reference to Father and Mother objects
             # based on their UID
-            for ind in individuals:
-                if ind.uid == father_id:
-                    father = ind
-                if ind.uid == mother_id:
-                    mother = ind
+            father = db.individual(fam.husband)
+            mother = db.individual(fam.wife)
 
             # Case when father dies more than 9 months before
             # birth of child. This is an error.
-            if father.death is not None and \
-                    father.death < individual.birthdate - timedelta(days=266):
+            if father and father.death and \
+                    father.death < individual.birthdate - DAYS_IN_9_MONTHS \
+                    and latest(father.death) < \
+                    earliest(individual.birthdate) - DAYS_IN_9_MONTHS:
                 error_description = "Child is born more than " +\
                     "9 months after death of father"
                 error_location = [fam.uid, individual.uid]
-                report_error(error_type, error_description, error_location)
+                report_error(result, error_type, error_description,
+                             error_location)
                 return_flag = False
 
             # Case when mother dies before birth of child.
             # This is impossible.
-            if mother.death is not None and mother.death < individual.birthdate:
+            if mother and mother.death and \
+                    mother.death < individual.birthdate and \
+                    latest(mother.death) < earliest(individual.birthdate):
                 error_descrip = "Child is born after death of mother"
                 error_location = [fam.uid, individual.uid]
-                report_error(error_type, error_descrip, error_location)
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-    return return_flag
+        return return_flag
+
+    return [individual_check], []
 
 
-def marriage_age(individuals, families):
+def marriage_age(db, result=None):
     """ US10 - Marriage should be atleast 14 years after the birth
         of both spouses - ANOMALY
     """
 
-    anom_type = "US10"
-    return_flag = True
+    _, (family_check,) = _marriage_age_checks(db, result)
+    return _check_families(db, family_check, db.families)
 
-    curr_date = datetime.today()
-    min_birt = datetime(curr_date.year - 14,
-                        curr_date.month, curr_date.day)
 
-    for family in families:
-        husband = None
-        wife = None
-        for individual in individuals:
-            if individual.uid == family.husband:
-                husband = individual
-            if individual.uid == family.wife:
-                wife = individual
-            # We have found both the husband and wife individuals
-            if husband is not None and wife is not None:
-                break
-
-        if husband.birthdate > min_birt:
+def _marriage_age_checks(db, result):
+    """ Per-record checks for US10 """
+    anom_type = "US10"
+    min_birt = years_ago(14)
+
+    def family_check(family, husband, wife):
+        return_flag = True
+        if husband and husband.birthdate > min_birt and \
+                earliest(husband.birthdate) > min_birt:
             anom_description = "Husband is married before 14 years old"
             anom_location = [family.uid, husband.uid]
-            report_anomaly(anom_type, anom_description, anom_location)
+            report_anomaly(result, anom_type, anom_description, anom_location)
             return_flag = False
 
-        if wife.birthdate > min_birt:
+        if wife and wife.birthdate > min_birt and \
+                earliest(wife.birthdate) > min_birt:
             anom_description = "Wife is married before 14 years old"
             anom_location = [family.uid, wife.uid]
-            report_anomaly(anom_type, anom_description, anom_location)
+            report_anomaly(result, anom_type, anom_description, anom_location)
             return_flag = False
-    return return_flag
+        return return_flag
+
+    return [], [family_check]
 
 
-def no_bigamy(individuals, families):
+def no_bigamy(db, result=None):
     """ US11 - Marriage should not occur during marriage to another spouse -
         ANOMALY
     """
-    # for each fams check for divorce or death prior to next fam
     anom_type = "US11"
     return_flag = True
 
-    for family in families:
-        # check if husband is in any other families
-        husband_uid = family.husband
-        wife_uid = family.wife
+    # Sweep each person's marriages in order of marriage date, remembering
+    # the marriage that stays open the longest so far
+    for uid, timeline in db.timelines.items():
+        open_marriage = None
+        for start, end, family in timeline:
+            if open_marriage is not None and open_marriage[2] is not family \
+                    and start < open_marriage[1] and \
+                    latest(start) < open_marriage[1]:
+                earlier = open_marriage[2]
+                if earlier.husband == uid:
+                    anomaly_description = "Marriage occured before "\
+                        "divorce or death from/of wife"
+                    a_loc = [earlier.wife, family.wife, uid]
+                else:
+                    anomaly_description = "Marriage occured before "\
+                        "divorce or death from/of husband"
+                    a_loc = [earlier.husband, family.husband, uid]
+                report_anomaly(result, anom_type, anomaly_description, a_loc)
+                return_flag = False
 
-        for fam_compare in families:
-            # Make sure not comparing against self
-            if fam_compare is family:
-                continue
+            if open_marriage is None or end > open_marriage[1]:
+                open_marriage = (start, end, family)
 
-            if fam_compare.husband == husband_uid:
-                if fam_compare.marriage > family.marriage:
-                    wife = next(x for x in individuals if x.uid == family.wife)
-
-                    # Family divorce should occur after or wife should die first
-                    if ((family.divorce < fam_compare.marriage) or
-                            ((wife.death) and (wife.death < fam_compare.marriage))):
-
-                        anomaly_description = "Marriage occured before "\
-                            "divorce or death from/of wife"
-                        a_loc = [family.wife, fam_compare.wife, family.husband]
-                        report_anomaly(anom_type, anomaly_description, a_loc)
-                        return_flag = False
-
-            if fam_compare.wife == wife_uid:
-                if fam_compare.marriage > family.marriage:
-                    husb = next(x for x in individuals if x.uid == family.husband)
-
-                    # Family divorce should occur after or wife should die first
-                    if (family.divorce > fam_compare.marriage) or \
-                        ((husb.death) and (husb.death < family.marriage)):
-                        anomaly_description =\
-                            "Marriage occured before divorce or death from/of husband"
-                        a_loc = [family.husband, fam_compare.husband, family.wife]
-                        report_anomaly(anom_type, anomaly_description, a_loc)
-                        return_flag = False
     return return_flag
 
 
-def parents_not_too_old(individuals, families):
+def parents_not_too_old(db, result=None):
     """ US12 - Mother should be less than 60 years older than her
     children and father should be less than 80 years older than his children -
     ANOMALY
     """
 
+    _, (family_check,) = _parents_not_too_old_checks(db, result)
+    return _check_families(db, family_check, db.families)
+
+
+def _parents_not_too_old_checks(db, result):
+    """ Per-record checks for US12 """
     anom_type = "US12"
-    return_flag = True
     DAYS_IN_60_YEARS = 21900
     DAYS_IN_80_YEARS = 29200
 
-    # Find all families with children
-    #   (create a list of all fams with non empty children)
-    fams_with_children = [x for x in families if x.children is not []]
-
-    for family in fams_with_children:
+    def family_check(family, husband, wife):
+        return_flag = True
 
-        mother = next((x for x in individuals if x.uid == family.wife), None)
-        father = next((x for x in individuals if x.uid == family.husband), None)
+        # Only families with children
+        if not family.children:
+            return return_flag
 
-        children_uids = family.children
+        mother, father = wife, husband
 
-        for child_uid in children_uids:
-            child = next((x for x in individuals if x.uid == child_uid), None)
+        for child in db.children(family):
 
-            if mother and child:  # This may be repetitive
-                if (child.birthdate - mother.birthdate) > \
-                        timedelta(DAYS_IN_60_YEARS):
+            if mother and mother.birthdate and child.birthdate:
+                if child.birthdate - mother.birthdate > DAYS_IN_60_YEARS \
+                        and earliest(child.birthdate) - \
+                        latest(mother.birthdate) > DAYS_IN_60_YEARS:
                     anom_description = "Mother is 60 years older than child"
                     anom_location = [mother.uid, child.uid]
-                    report_anomaly(anom_type, anom_description, anom_location)
+                    report_anomaly(result, anom_type, anom_description,
+                                   anom_location)
                     return_flag = False
 
-            if father and child:  # This may be repetitive
-                if (child.birthdate - father.birthdate) > \
-                        timedelta(days=DAYS_IN_80_YEARS):
+            if father and father.birthdate and child.birthdate:
+                if child.birthdate - father.birthdate > DAYS_IN_80_YEARS \
+                        and earliest(child.birthdate) - \
+                        latest(father.birthdate) > DAYS_IN_80_YEARS:
                     anom_description = "Father is 80 years older than child"
                     anom_location = [father.uid, child.uid]
-                    report_anomaly(anom_type, anom_description, anom_location)
+                    report_anomaly(result, anom_type, anom_description,
+                                   anom_location)
                     return_flag = False
+        return return_flag
 
-    return return_flag
+    return [], [family_check]
 
-def sibling_spacing(individuals,families):
+def sibling_spacing(db, result=None):
     """ US13  -  Birth dates of siblings should be more than 8 months apart or
         less than 2 days apart """
     error_type = "US13"
     return_flag = True
 
-    for family in families:
-        sibling_uids = family.children
-        siblings = list(x for x in individuals if x.uid in sibling_uids)
-
-        sib_birthdays = sorted(siblings, key=lambda ind: ind.birthdate, reverse=False)
-        i=0
-        count = len(sib_birthdays)
-        while i < count-1:
-            diff = sib_birthdays[i+1].birthdate - sib_birthdays[i].birthdate
-            if (diff > timedelta(days=2) and diff < timedelta(days=243)):
+    for _, siblings in db.sibling_groups:
+        # Groups are sorted by birth date, so compare neighbours only
+        born = [sibling for sibling in siblings if sibling.birthdate]
+        for older, younger in zip(born, born[1:]):
+            # Impossible only if every pair of days in the two ranges is
+            # more than 2 days and less than 8 months apart
+            first, second = older.birthdate, younger.birthdate
+            if not 2 < second - first < DAYS_IN_8_MONTHS:
+                continue
+            closest = max(earliest(second) - latest(first),
+                          earliest(first) - latest(second))
+            furthest = max(latest(second) - earliest(first),
+                           latest(first) - earliest(second))
+            if closest > 2 and furthest < DAYS_IN_8_MONTHS:
                 error_descrip = "Difference in sibling age impossible!"
-                error_location = [sib_birthdays[i+1].uid, sib_birthdays[i].uid]
-                report_error(error_type, error_descrip, error_location)
+                error_location = [younger.uid, older.uid]
+                report_error(result, error_type, error_descrip, error_location)
                 return_flag = False
-            i+=1
-        return return_flag
 
-def multiple_births_less_5(individuals,families):
+    return return_flag
+
+def multiple_births_less_5(db, result=None):
     """ US14  -  No more than five siblings should be born at the same time"""
     error_type = "US14"
     return_flag = True
 
-    for family in families:
-        sibling_uids = family.children
-        siblings = list(x for x in individuals if x.uid in sibling_uids)
-        sib_birthdays = []
+    for family, siblings in db.sibling_groups:
+        # Groups are sorted by birth date, so a multiple birth is a run
+        most = run = 0
+        previous = None
         for sibling in siblings:
-            sib_birthdays.append(sibling.birthdate)
-        result = Counter(sib_birthdays).most_common(1)
-        for (a,b) in result:
-            if b > 5:
-                error_descrip = "More than 5 siblings born at once"
-                error_location = [family.uid]
-                report_error(error_type, error_descrip, error_location)
-                return_flag = False
+            # Only siblings born on a known day are certainly born at once
+            if not sibling.birthdate or \
+                    earliest(sibling.birthdate) != latest(sibling.birthdate):
+                continue
+            run = run + 1 if sibling.birthdate == previous else 1
+            previous = sibling.birthdate
+            most = max(most, run)
+
+        if most > 5:
+            error_descrip = "More than 5 siblings born at once"
+            error_location = [family.uid]
+            report_error(result, error_type, error_descrip, error_location)
+            return_flag = False
 
     return return_flag
 
 
-def fewer_than_fifteen_siblings(_, families):
+def fewer_than_fifteen_siblings(db, result=None):
     """ US15 - Families should not have more than 15 children - ANOMALY """
+
+    _, (family_check,) = _fewer_than_fifteen_siblings_checks(db, result)
+    return _check_families(db, family_check, db.families)
+
+
+def _fewer_than_fifteen_siblings_checks(db, result):
+    """ Per-record checks for US15 """
     anom_type = "US15"
-    return_flag = True
 
-    for family in families:
+    def family_check(family, husband, wife):
         if len(family.children) >= 15:
             anom_description = "Family has 15 or more siblings"
             anom_location = [family.uid]
-            report_anomaly(anom_type, anom_description, anom_location)
-            return_flag = False
-    return return_flag
+            report_anomaly(result, anom_type, anom_description, anom_location)
+            return False
+        return True
 
-
-def strip_surname(individual):
-    """ Strip surname out of individual's name """
-    match = re.search(r"/(.*)/", (" ".join(individual.name)))
-    if match:
-        return match.group(1)
-    else:
-        return ""
+    return [], [family_check]
 
 
-def male_last_names(individuals, families):
+def male_last_names(db, result=None):
     """ US16 -- all males in a family should have the same last name """
     anom_type = "US16"
     return_flag = True
 
-    for family in families:
-        males = []
-        for individual in individuals:
-            if individual.sex is "M" and (
-                family.uid in individual.famc or
-                family.uid in individual.fams):
-                males.append(individual)
+    # Group the males by every family they are a child or spouse in. The
+    # surname index (db.surnames) is keyed the other way round, and the
+    # males of a family would still have to be put back in file order to
+    # keep the first one as the reference, so one pass is as cheap.
+    family_males = {}
+    for individual in db.individuals:
+        if individual.sex is "M":
+            for fam_uid in set(individual.famc + individual.fams):
+                family_males.setdefault(fam_uid, []).append(individual)
+
+    for family in db.families:
+        males = family_males.get(family.uid, [])
         for male in males[1:]:
-            if strip_surname(male) != strip_surname(males[0]):
+            if male.surname != males[0].surname:
                 return_flag = False
                 anom_descrip = "Male surname mismatch in family"
                 anom_location = [male.uid, family.uid]
-                report_anomaly(anom_type, anom_descrip, anom_location)
+                report_anomaly(result, anom_type, anom_descrip, anom_location)
+    return return_flag
+
+
+def no_ancestry_cycles(db, result=None):
+    """ GC01 - No individual should be their own ancestor - ERROR """
+    error_type = "GC01"
+    return_flag = True
+
+    for cycle in db.graph.cycles():
+        error_descrip = "Individual is their own ancestor"
+        error_location = sorted(cycle)
+        report_error(result, error_type, error_descrip, error_location)
+        return_flag = False
+
     return return_flag
 
 
-def no_marriage_to_decendants(_, families):
+def no_marriage_to_decendants(db, result=None):
     """ US17- Parents should not marry any of their descendants - ANOMALY """
     anom_type = "US17"
     return_flag = True
+    graph = db.graph
 
-    for family in families:
-        decendants = []
-
-        decendants.extend(family.children)
-        for decendant in decendants:
-            temp_decs = return_children(decendant, families)
-            if temp_decs is not None:
-                decendants.extend(temp_decs)
+    for family in db.families:
+        if not (family.husband and family.wife):
+            continue
 
-        if family.husband and family.wife and family.wife in decendants:
+        if graph.is_descendant(family.wife, family.husband):
             anom_descrip = "Wife is decendant of spouse"
             anom_location = [family.wife, family.husband]
-            report_anomaly(anom_type, anom_descrip, anom_location)
+            report_anomaly(result, anom_type, anom_descrip, anom_location)
             return_flag = False
 
-        if family.husband and family.wife and family.wife in decendants:
+        if graph.is_descendant(family.husband, family.wife):
             anom_descrip = "Husband is decendant of spouse"
-            anom_location = [family.wife, family.husband]
-            report_anomaly(anom_type, anom_descrip, anom_location)
+            anom_location = [family.husband, family.wife]
+            report_anomaly(result, anom_type, anom_descrip, anom_location)
             return_flag = False
 
     return return_flag
 
-def return_children(uid, families):
-    """ Helper function for no_marriage_to_decendants """
-    # find family where uid is a Parents
-    family = next((x for x in families if x.husband == uid), None)
-    if family is None:
-        family = next((x for x in families if x.wife == uid), None)
-
-    if family is None:  # Is never a parent
-        return None
-    else:
-        return family.children
-
-
-def no_sibling_marriage(individuals, families):
+def no_sibling_marriage(db, result=None):
     """ US18 - Siblings should not marry one another - ANOMALY """
     anom_type = "US18"
     return_flag = True
 
-    for family in families:
-        sibling_uids = family.children
-        siblings = list(x for x in individuals if x.uid in sibling_uids)
+    for _, siblings in db.sibling_groups:
+        sibling_uids = set(sibling.uid for sibling in siblings)
 
         for sibling in siblings:
-            sib_fam = next((x for x in families if x.husband == sibling.uid),
-                           None)
-
-            if sib_fam and sib_fam.wife in sibling_uids:
-                anom_descrip = "Sibling is married to another sibling"
-                anom_location = [sibling.uid, sib_fam.wife]
-                report_anomaly(anom_type, anom_descrip, anom_location)
-                return_flag = False
+            for marriage in db.spouse_families(sibling.uid):
+                if marriage.husband == sibling.uid and \
+                        marriage.wife in sibling_uids:
+                    anom_descrip = "Sibling is married to another sibling"
+                    anom_location = [sibling.uid, marriage.wife]
+                    report_anomaly(result, anom_type, anom_descrip,
+                                   anom_location)
+                    return_flag = False
 
     return return_flag
 
 
-def correct_gender_for_role(individuals, families):
+def correct_gender_for_role(db, result=None):
     """ US21 - Correct Gender for Role; husband should be male, wife should
     be female - ANOMALY """
-    anom_type = "US21"
-    return_flag = True
 
-    for family in families:
-        husband_id = family.husband
-        wife_id = family.wife
+    _, (family_check,) = _correct_gender_for_role_checks(db, result)
+    return _check_families(db, family_check, db.families)
 
-        husband = None
-        wife = None
 
-        for individual in individuals:
-            if individual.uid == husband_id:
-                husband = individual
-            if individual.uid == wife_id:
-                wife = individual
+def _correct_gender_for_role_checks(db, result):
+    """ Per-record checks for US21 """
+    anom_type = "US21"
 
-        if husband.sex is not "M":
+    def family_check(family, husband, wife):
+        return_flag = True
+        if husband and husband.sex is not "M":
             anom_descrip = "Husband is not a male"
-            anom_location = [individual.uid, family.uid]
-            report_anomaly(anom_type, anom_descrip, anom_location)
+            anom_location = [husband.uid, family.uid]
+            report_anomaly(result, anom_type, anom_descrip, anom_location)
             return_flag = False
 
-        if wife.sex is not "F":
+        if wife and wife.sex is not "F":
             anom_descrip = "Wife is not a female"
-            anom_location = [individual.uid, family.uid]
-            report_anomaly(anom_type, anom_descrip, anom_location)
+            anom_location = [wife.uid, family.uid]
+            report_anomaly(result, anom_type, anom_descrip, anom_location)
             return_flag = False
-    return return_flag
+        return return_flag
+
+    return [], [family_check]
 
 
-def unique_ids(individuals, families):
+def unique_ids(db, result=None):
     """ US22 - All individual IDs and Family IDs should be unique """
     error_type = "US22"
     return_flag = True
 
-    individual_list = []
-    family_list = []
+    individual_ids = set()
+    family_ids = set()
 
-    for individual in individuals:
-        if individual.uid in individual_list:
+    for individual in db.individuals:
+        if individual.uid in individual_ids:
             error_descrip = "Individual ID already exists"
             error_location = [individual.uid]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
         else:
-            individual_list.append(individual.uid)
-    for family in families:
-        if family.uid in family_list:
+            individual_ids.add(individual.uid)
+    for family in db.families:
+        if family.uid in family_ids:
             error_descrip = "Family ID already exists"
             error_location = [family.uid]
-            report_error(error_type, error_descrip, error_location)
+            report_error(result, error_type, error_descrip, error_location)
             return_flag = False
         else:
-            family_list.append(family.uid)
+            family_ids.add(family.uid)
     return return_flag
 
 
-def unique_names_and_birth_dates(individuals, families):
+def unique_names_and_birth_dates(db, result=None):
     """ US23 - No more than one individual with the same name and birth
         date should appear in a GEDCOM file - ANOMALY """
     anom_type = "US23"
     return_flag = True
 
-    for individual in individuals:
-        for compare_indiv in individuals:
-            if individual.name and compare_indiv.name \
-                    and individual.name == compare_indiv.name:
-                # same name, compare birthdate
-                if compare_indiv.birthdate and individual.birthdate \
-                        and compare_indiv.birthdate and individual.birthdate:
-
-                    anom_descrip = "Two individuals share a name and birthdate"
-                    anom_location = [individual.uid, compare_indiv.uid]
-                    report_anomaly(anom_type, anom_descrip, anom_location)
-                    return_flag = False
+    # Group individuals by (name, birth date) in a single pass
+    groups = OrderedDict()
+    for individual in db.individuals:
+        if individual.name and individual.birthdate:
+            key = (normalise_name(individual.name), individual.birthdate)
+            groups.setdefault(key, []).append(individual.uid)
+
+    for uids in groups.values():
+        if len(uids) > 1:
+            anom_descrip = "Individuals share a name and birthdate"
+            report_anomaly(result, anom_type, anom_descrip, uids)
+            return_flag = False
 
     return return_flag
 
-def unique_families_by_spouses(individuals, families):
+def unique_families_by_spouses(db, result=None):
     """ US24 - No more than one family with the same spouses by name and the
     same marriage date should appear in a GEDCOM file - ANOMALY """
     anom_type = "US24"
     return_flag = True
 
-    for family in families:
-        wife = next((x for x in individuals if x.uid == family.wife),
-                    None)
-        husband = next((x for x in individuals if x.uid == family.husband),
-                       None)
-        marriage = family.marriage
-
-        for compare_family in families:
-            c_wife = next((x for x in individuals if x.uid == family.wife),
-                          None)
-            c_husband = next((x for x in individuals if x.uid == family.husband),
-                             None)
-            c_marriage = family.marriage
-
-            if wife and husband and marriage\
-                and c_wife and c_husband and c_marriage\
-                and wife.name and husband.name\
-                and c_wife.name and c_husband.name\
-                and wife.name == c_wife.name\
-                and husband.name == c_husband.name\
-                    and c_marriage == marriage:
-
-                anom_descrip = "Two families share spouse names and marriage"\
-                    + " dates"
-                anom_location = [fam.uid, c_fam.uid]
-                report_anomaly(anom_type, anom_descrip, anom_location)
-                return_flag = False
+    # Group families by (husband name, wife name, marriage) in a single pass
+    groups = OrderedDict()
+    for family in db.families:
+        husband = db.individual(family.husband)
+        wife = db.individual(family.wife)
+
+        if family.marriage and husband and wife \
+                and husband.name and wife.name:
+            key = (normalise_name(husband.name), normalise_name(wife.name),
+                   family.marriage)
+            groups.setdefault(key, []).append(family.uid)
+
+    for uids in groups.values():
+        if len(uids) > 1:
+            anom_descrip = "Families share spouse names and marriage date"
+            report_anomaly(result, anom_type, anom_descrip, uids)
+            return_flag = False
 
     return return_flag
 
-def list_deceased(individuals, _):
+def list_deceased(db):
     """ US29 - List the deceased individuals """
     deceased = []
-    for individual in individuals:
-        if individual.death is not None:
+    for individual in db.individuals:
+        if individual.death:
             deceased.append(individual)
     return deceased
 
-def list_living_married(individuals, families):
+def list_living_married(db):
     """ US30 - List the living married people """
     living = []
-    for family in families:
-        husband_id = family.husband
-        wife_id = family.wife
-
-        husband = None
-        wife = None
-
-        for individual in individuals:
-            if individual.uid == husband_id and individual.death is None:
-                husband = individual
-            if individual.uid == wife_id and individual.death is None:
-                wife = individual
-        if wife is not None and husband is not None:
+    for family in db.families:
+        husband = db.individual(family.husband)
+        wife = db.individual(family.wife)
+
+        if wife and not wife.death and husband and not husband.death:
             living.append(wife)
             living.append(husband)
     return living
+
+
+### USER STORY REGISTRY ###
+
+# Every user story, in the order validation runs them
+RULES = [
+    # Sprint 1
+    Rule("US01", ERROR, dates_before_current, _dates_before_current_checks,
+         ("date_columns",), "Dates before current date"),
+    Rule("US02", ERROR, birth_before_marriage, _birth_before_marriage_checks,
+         (), "Birth before marriage"),
+    Rule("US03", ERROR, birth_before_death, _birth_before_death_checks,
+         ("date_columns",), "Birth before death"),
+    Rule("US04", ERROR, marriage_before_divorce,
+         _marriage_before_divorce_checks, ("date_columns",),
+         "Marriage before divorce"),
+    Rule("US05", ERROR, marriage_before_death, _marriage_before_death_checks,
+         (), "Marriage before death"),
+    Rule("US06", ERROR, divorce_before_death, _divorce_before_death_checks,
+         (), "Divorce before death"),
+
+    # Sprint 2
+    Rule("US07", ERROR, age_less_150, _age_less_150_checks,
+         ("date_columns",), "Less than 150 years old"),
+    Rule("US08", ANOMALY, birth_before_marriage_of_parents,
+         _birth_before_marriage_of_parents_checks, (),
+         "Birth before marriage of parents"),
+    Rule("US09", ERROR, birth_before_death_of_parents,
+         _birth_before_death_of_parents_checks, (),
+         "Birth before death of parents"),
+    Rule("US10", ANOMALY, marriage_age, _marriage_age_checks, (),
+         "Marriage after 14"),
+    Rule("US12", ANOMALY, parents_not_too_old, _parents_not_too_old_checks,
+         (), "Parents not too old"),
+    Rule("US11", ANOMALY, no_bigamy, None, ("timelines",), "No bigamy",
+         ("marriage", "divorce", "husband", "wife", "death")),
+
+    # Sprint 3
+    Rule("US13", ERROR, sibling_spacing, None, ("sibling_groups",),
+         "Siblings spacing", ("children", "birthdate")),
+    Rule("US14", ERROR, multiple_births_less_5, None, ("sibling_groups",),
+         "Multiple births <= 5", ("children", "birthdate")),
+    Rule("US15", ANOMALY, fewer_than_fifteen_siblings,
+         _fewer_than_fifteen_siblings_checks, (), "Fewer than 15 siblings"),
+    Rule("US16", ANOMALY, male_last_names, None, (), "Male last names",
+         ("sex", "surname", "famc", "fams")),
+    Rule("US18", ANOMALY, no_sibling_marriage, None, ("sibling_groups",),
+         "Siblings should not marry",
+         ("children", "birthdate", "husband", "wife")),
+    Rule("GC01", ERROR, no_ancestry_cycles, None, ("graph",),
+         "No individual is their own ancestor",
+         ("children", "husband", "wife")),
+    Rule("US17", ANOMALY, no_marriage_to_decendants, None, ("graph",),
+         "No marriages to descendants", ("children", "husband", "wife")),
+
+    # Sprint 4
+    Rule("US21", ANOMALY, correct_gender_for_role,
+         _correct_gender_for_role_checks, (), "Correct gender for role"),
+    Rule("US22", ERROR, unique_ids, None, (), "Unique IDs", ()),
+    Rule("US23", ANOMALY, unique_names_and_birth_dates, None, (),
+         "Unique name and birth date", ("name", "birthdate")),
+    Rule("US24", ANOMALY, unique_families_by_spouses, None, (),
+         "Unique families by spouses",
+         ("marriage", "husband", "wife", "name")),
+    Rule("US29", LISTING, list_deceased, None, (), "Deceased Individuals"),
+    Rule("US30", LISTING, list_living_married, None, (),
+         "Living Married Individuals"),
+]
@@ -0,0 +1,142 @@
+""" Python module for parsing GEDCOM geneaology files - watch mode
+
+    This file keeps GEDCOM files validated while they are edited, printing
+    the findings each edit adds or resolves
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+
+from incremental import IncrementalValidation
+from batch import find_files
+from reporter import table_rows, table_locations
+
+POLL_INTERVAL = 0.5  # Seconds between looks at the watched files
+
+
+class Watch(object):
+    """ Validation of a GEDCOM file, or of every '.ged' file under a
+    directory, kept in memory between edits.
+
+    Each poll() stats the watched files and brings the IncrementalValidation
+    of each one that changed up to date. The parsed records, indexes and
+    findings stay in this process, so an edit costs only the blocks it
+    touched and the user stories they feed.
+    """
+
+    def __init__(self, path, rules=None, stream=None):
+        self.path = path
+        self.rules = rules
+        self.stream = stream if stream is not None else sys.stdout
+        self.validations = {}  # filename -> IncrementalValidation
+        self.findings = {}  # filename -> findings of its last validation
+        self._stats = {}  # filename -> (mtime, size) when last validated
+
+    def files(self):
+        """ Returns the watched files """
+        if os.path.isdir(self.path):
+            return find_files(self.path)
+        return [self.path]
+
+    def poll(self):
+        """ Revalidates the watched files that changed since the last poll
+        and prints the findings that appeared or were resolved. A file
+        removed from a watched directory has all its findings resolved.
+        Returns the number of files revalidated. """
+        files = self.files()
+        revalidated = 0
+
+        for filename in files:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                # Being replaced; it is looked at again next poll
+                continue
+            if self._stats.get(filename) == (stat.st_mtime, stat.st_size):
+                continue
+            self._stats[filename] = (stat.st_mtime, stat.st_size)
+
+            validation = self.validations.get(filename)
+            if validation is None:
+                validation = IncrementalValidation(filename, self.rules)
+                self.validations[filename] = validation
+            start = time.time()
+            try:
+                findings = validation.update().findings
+            except Exception as error:
+                # Most likely saved half written; validated from scratch when
+                # it next changes
+                del self.validations[filename]
+                self.stream.write("[!!] %s could not be validated: %s\n"
+                                  % (filename, error))
+                continue
+            self._print(filename, self.findings.get(filename, []), findings,
+                        time.time() - start)
+            self.findings[filename] = findings
+            revalidated += 1
+
+        if os.path.isdir(self.path):
+            for filename in sorted(set(self.findings) - set(files)):
+                self._print(filename, self.findings.pop(filename), [], 0)
+                # Gone already if its last update failed
+                self.validations.pop(filename, None)
+                self._stats.pop(filename, None)
+
+        self.stream.flush()
+        return revalidated
+
+    def _print(self, filename, before, after, elapsed):
+        """ Prints the findings of after not in before, and those of
+        before no longer in after """
+        new, resolved = changes(before, after)
+        lines = ["[%s] %s: %d new, %d resolved (%.2f s)\n"
+                 % (time.strftime("%H:%M:%S"), filename, len(new),
+                    len(resolved), elapsed)]
+        for title, findings in (("New", new), ("Resolved", resolved)):
+            if findings:
+                lines.append("%s:\n" % title)
+                for finding in findings:
+                    lines.extend(table_rows(finding.severity, finding.story,
+                                            finding.message,
+                                            table_locations(
+                                                finding.locations)))
+        self.stream.write(''.join(lines))
+
+
+def watch(path, rules=None, interval=POLL_INTERVAL, stream=None):
+    """ Watches path, a GEDCOM file or a directory of them, revalidating on
+    every change until interrupted. The findings go to stream, by default
+    the console. """
+    session = Watch(path, rules, stream)
+    print "Watching %s for changes. Press Ctrl+C to stop." % path
+    try:
+        while True:
+            session.poll()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def changes(before, after):
+    """ Returns the findings of after that are not in before and those of
+    before that are not in after, each in their original order. A finding
+    reported twice needs two matches. """
+    def key(finding):
+        """ Hashable form of a finding """
+        return (finding.story, finding.severity, finding.message,
+                tuple(finding.locations))
+
+    def missing(findings, others):
+        """ The findings without a match in others """
+        unmatched = Counter(key(finding) for finding in others)
+        result = []
+        for finding in findings:
+            if unmatched[key(finding)] > 0:
+                unmatched[key(finding)] -= 1
+            else:
+                result.append(finding)
+        return result
+
+    return missing(after, before), missing(before, after)